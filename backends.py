@@ -0,0 +1,267 @@
+"""
+Selectable backends for the field arithmetic of floating-offset types. A backend is a
+set of implementations of +, -, * and their in-place forms, and every type runs one of
+them:
+
+    native      the methods a type is created with: the generated kernels, falling back
+                to the word arithmetic of ABCMethods, with any lookup tables installed
+    reference   the original bit-vector engine of ABCMethods, which works on the fields as
+                lists of bools with signed_add, unsigned_subtract, invert,
+                unsigned_multiply and shift_left/shift_right, one bit at a time
+
+The reference backend is slow and kept as an oracle: a faster backend is registered with
+register(), checked against it with differential(), and only then selected.
+
+    backends.use("reference")            every type, including types made later
+    backends.use("reference", Radical)   one type, whatever every type uses
+    with backends.using("reference"): ...
+
+A backend goes on a type as a layer owned by OWNER (see EqualityMeta), so leaving it
+gives back whatever method is under it then, lookup tables and profiling included.
+
+Values of mixed forms, whose fields the bit-vector engine cannot combine, take the same
+path in every backend: + and - normalize both operands and try again, and * multiplies
+the values exactly.
+
+Running this file runs the differential fuzz of the reference backend against the native
+one and exits with status 1 on any mismatch.
+"""
+
+import argparse
+import contextlib
+import random
+import sys
+import time
+
+from floating_offset import ABC, ABCMethods, EqualityMeta, NotImplementedException
+
+#the operations a backend provides, by attribute, with the operation each one performs
+#and whether it updates the left operand
+OPERATIONS = {"__add__": ("+", False), "__sub__": ("-", False), "__mul__": ("*", False),
+              "__iadd__": ("+", True), "__isub__": ("-", True), "__imul__": ("*", True)}
+
+NATIVE = "native"
+
+#the field of self and other that + - and * edit, as (shift, length, mask, untouched, signed),
+#or None for values of mixed forms
+def field_of(self, other):
+    cls = type(self)
+    difference = self.word ^ other.word
+    if not difference & cls.bc_field_mask and cls.a_len != 0:
+        return cls.a_shift, cls.a_len, cls.a_mask, cls.bc_field_mask, True
+    if not difference & cls.ac_field_mask and cls.b_len != 0:
+        return cls.b_shift, cls.b_len, cls.b_mask, cls.ac_field_mask, False
+    return None
+
+#the product of two field bit vectors, with overflow handled according to the mode of cls
+#a product that does not wrap is taken at twice the width, where it cannot overflow, and
+#read back to see whether it fits the field
+def reference_multiply(cls, bits0, bits1, signed):
+    multiply = ABCMethods.signed_multiply if signed else ABCMethods.unsigned_multiply
+    if cls.overflow == ABCMethods.WRAP:
+        return ABCMethods.bits_to_int(multiply(bits0, bits1))
+    length = len(bits0)
+    extend = lambda bits: [signed and bits[0]]*length + bits
+    product = ABCMethods.bits_to_int(multiply(extend(bits0), extend(bits1)))
+    if signed:
+        product, extrema = ABCMethods.to_signed(product, 2*length), cls.a_extrema
+    else:
+        extrema = cls.b_extrema
+    return ABCMethods.fit_field(product, extrema, (1 << length) - 1, cls.overflow)
+
+#implementation of + - and * (operation) on the bit vectors of the edited field
+def reference_arithmetic(self, other, operation):
+    self, other = ABCMethods.coerce(self, other)
+    cls = type(self)
+    field = field_of(self, other)
+    if field is None:
+        if operation == "*":
+            return ABCMethods.multiplication(self, other)
+        normal_word0, normal_word1 = cls.normal_word(self.word), cls.normal_word(other.word)
+        if normal_word0 != self.word or normal_word1 != other.word:
+            return reference_arithmetic(ABCMethods.from_word(cls, normal_word0), ABCMethods.from_word(cls, normal_word1), operation)
+        raise NotImplementedException()
+    shift, length, mask, untouched, signed = field
+    bits0 = ABCMethods.int_to_bits((self.word >> shift) & mask, length)
+    bits1 = ABCMethods.int_to_bits((other.word >> shift) & mask, length)
+    if operation == "+":
+        result = ABCMethods.bits_to_int(ABCMethods.signed_add(bits0, bits1))
+    elif operation == "-":
+        result = ABCMethods.bits_to_int(ABCMethods.unsigned_subtract(bits0, bits1))
+    else:
+        result = reference_multiply(cls, bits0, bits1, signed)
+    return ABCMethods.from_word(cls, result << shift | (self.word & untouched))
+
+#the method of attribute in the reference backend
+def reference_method(operation, in_place):
+    if in_place:
+        return lambda self, other: ABCMethods.store(self, reference_arithmetic(self, other, operation))
+    return lambda self, other: reference_arithmetic(self, other, operation)
+
+#the registered backends, by name, as dicts from attribute to method
+#a backend that leaves out an attribute runs the native method for it
+BACKENDS = {NATIVE: {},
+            "reference": {attribute: reference_method(operation, in_place)
+                          for attribute, (operation, in_place) in OPERATIONS.items()}}
+
+#the backend every type runs unless it has one of its own, and the backends chosen for single types
+default = NATIVE
+chosen = {}
+#the owner of the layers backends put over the methods of types
+OWNER = "backends"
+
+#adds a backend under name, from a dict of methods taking (self, other) by attribute
+def register(name, methods):
+    unknown = set(methods) - set(OPERATIONS)
+    if unknown:
+        raise ValueError("backends only provide " + ", ".join(OPERATIONS) + ", not " + ", ".join(sorted(unknown)))
+    BACKENDS[name] = dict(methods)
+
+#the name of the backend cls runs
+def backend(cls):
+    return chosen.get(cls, default)
+
+#the native method of attribute on cls, which is whatever the layer of the backend covers,
+#so lookup tables or profiling put on before the backend are kept
+def native_method(cls, attribute):
+    return cls.layer_below(attribute, OWNER)
+
+#the method of attribute on cls under the backend name
+def method(name, cls, attribute):
+    return BACKENDS[name].get(attribute) or native_method(cls, attribute)
+
+#puts the methods of the backend cls runs over its methods, or takes them off again when
+#it runs the native one
+def install(cls):
+    methods = BACKENDS[backend(cls)]
+    for attribute in OPERATIONS:
+        if attribute in methods:
+            cls.add_layer(attribute, OWNER, methods[attribute])
+        else:
+            cls.remove_layer(attribute, OWNER)
+
+"""
+Makes cls, or every type when cls is None, run the backend name. A type given a backend of
+its own keeps it when the backend of every type changes, until it is given NATIVE or
+another backend again. Raises ValueError for a name that is not registered.
+"""
+def use(name, cls = None):
+    global default
+    if name not in BACKENDS:
+        raise ValueError("no backend named " + repr(name) + ", only " + ", ".join(BACKENDS))
+    if cls is not None:
+        chosen[cls] = name
+        install(cls)
+        return
+    default = name
+    for interned in list(EqualityMeta.interned.values()):
+        install(interned)
+    if default == NATIVE and install in EqualityMeta.creation_hooks:
+        EqualityMeta.creation_hooks.remove(install)
+    elif default != NATIVE and install not in EqualityMeta.creation_hooks:
+        EqualityMeta.creation_hooks.append(install)
+
+#runs the body of a with block with cls, or every type, on the backend name, and puts the
+#backend used before back when the block ends
+@contextlib.contextmanager
+def using(name, cls = None):
+    previous = default if cls is None else chosen.get(cls)
+    use(name, cls)
+    try:
+        yield
+    finally:
+        if cls is None:
+            use(previous)
+        elif previous is None:
+            chosen.pop(cls)
+            install(cls)
+        else:
+            use(previous, cls)
+
+#the layouts the differential fuzz runs on, each given as the arguments ABC is called with
+FUZZ_LAYOUTS = [("Signed 8-Bit Integer", 8, 8, 8), ("Saturating Signed 8-Bit Integer", 8, 8, 8, ABCMethods.SATURATE),
+                ("Checked Signed 8-Bit Integer", 8, 8, 8, ABCMethods.RAISE), ("Unsigned 16-Bit Integer", 0, 16, 16),
+                ("8-Bit Radical", 3, 6, 8), ("Saturating 16-Bit Radical", 6, 13, 16, ABCMethods.SATURATE),
+                ("Signed 64-Bit Integer", 64, 64), ("Rational", 32, 62), ("Radical", 16, 48),
+                ("Checked Radical", 16, 48, 64, ABCMethods.RAISE), ("256-Bit Radical", 64, 192, 256)]
+
+#count random pairs of values of cls: mostly pairs that share B and C or A and C, the
+#field-wise cases, and some that share nothing
+#values that share nothing get a small B and C, since combining them exactly raises B to
+#powers of the other C
+def random_pairs(cls, count, generator):
+    pairs = []
+    for _ in range(count):
+        base = generator.getrandbits(cls.vector_size)
+        choice = generator.random()
+        words = []
+        for _ in range(2):
+            word = generator.getrandbits(cls.vector_size)
+            if choice < 0.4:
+                word = (word & cls.a_field_mask) | (base & cls.bc_field_mask)
+            elif choice < 0.8:
+                word = (word & cls.b_field_mask) | (base & cls.ac_field_mask)
+            else:
+                word = (word & cls.a_field_mask) | (generator.randint(0, min(cls.b_mask, 1000)) << cls.b_shift) | \
+                       (generator.randint(-3, 3) & cls.c_mask)
+            words.append(word)
+        pairs.append(words)
+    return pairs
+
+#the results of the method of attribute under the backend name on pairs of words of cls,
+#as words or exception class names, with the seconds they took
+def run(name, cls, attribute, pairs):
+    operation = method(name, cls, attribute)
+    results = []
+    start = time.perf_counter()
+    for word0, word1 in pairs:
+        try:
+            results.append(operation(ABCMethods.from_word(cls, word0), ABCMethods.from_word(cls, word1)).word)
+        except Exception as exception:
+            results.append(type(exception).__name__)
+    return results, time.perf_counter() - start
+
+"""
+Runs count random pairs of values of every layout through every operation of the backends
+name0 and name1 and compares the results, exceptions included. Returns one row per layout
+and operation as a dict with the type, the attribute, the number of pairs, the mismatches
+as (word0, word1, result0, result1) and the seconds each backend took.
+"""
+def differential(name0 = "reference", name1 = NATIVE, layouts = FUZZ_LAYOUTS, count = 200, seed = 0):
+    generator = random.Random(seed)
+    rows = []
+    for arguments in layouts:
+        cls = ABC(*arguments)
+        for attribute in OPERATIONS:
+            pairs = random_pairs(cls, count, generator)
+            results0, seconds0 = run(name0, cls, attribute, pairs)
+            results1, seconds1 = run(name1, cls, attribute, pairs)
+            mismatches = [(word0, word1, result0, result1)
+                          for (word0, word1), result0, result1 in zip(pairs, results0, results1) if result0 != result1]
+            rows.append({"type": cls, "attribute": attribute, "pairs": count, "mismatches": mismatches,
+                         "seconds": (seconds0, seconds1)})
+    return rows
+
+#prints one line per row of differential, with the speed of name0 relative to name1, and
+#the first few mismatches of each row
+def print_report(rows, name0 = "reference", name1 = NATIVE, shown = 3):
+    for row in rows:
+        cls = row["type"]
+        seconds0, seconds1 = row["seconds"]
+        print((cls.__name__ + " (" + cls.offsets_string + ", " + cls.overflow + ")").ljust(52) + row["attribute"].ljust(10) +
+              str(len(row["mismatches"])).rjust(6) + " mismatches  " + name0 + " " +
+              format(seconds0/seconds1, ".1f") + "x the time of " + name1)
+        for word0, word1, result0, result1 in row["mismatches"][:shown]:
+            print("  " + hex(word0) + ", " + hex(word1) + ": " + str(result0) + " != " + str(result1))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Differential fuzz of two floating-offset backends.")
+    parser.add_argument("--backend", default = "reference", help = "the backend checked (default reference)")
+    parser.add_argument("--against", default = NATIVE, help = "the backend it is checked against (default native)")
+    parser.add_argument("--count", type = int, default = 200, help = "random pairs per layout and operation")
+    parser.add_argument("--seed", type = int, default = 0, help = "seed of the random pairs")
+    arguments = parser.parse_args()
+    rows = differential(arguments.backend, arguments.against, count = arguments.count, seed = arguments.seed)
+    print_report(rows, arguments.backend, arguments.against)
+    if any(row["mismatches"] for row in rows):
+        sys.exit(1)
@@ -0,0 +1,369 @@
+"""
+Micro-benchmarks for floating-offset operations, built on timeit so they run offline
+with nothing beyond the standard library. Running this file prints one table per
+benchmark with the time per call of each operation.
+
+The suite (suite_benchmark) times every ABCMethods operation on a fixed set of layouts
+and widths, along with normalize and the russian-peasant routines, under stable names.
+Its results can be written as JSON with --json and checked against a JSON file saved
+earlier with --baseline, in which case the run fails with exit status 1 when any
+operation is slower than its baseline by more than --threshold (25% by default):
+
+    python benchmark.py --suite --json baseline.json
+    python benchmark.py --suite --baseline baseline.json
+
+Each operation is also timed relative to a fixed reference statement, the two being
+run in alternating short bursts, and the regression check compares those ratios, so
+a machine that runs faster or slower as a whole (a busy host, frequency scaling) does
+not trip it. Absolute timings still depend on the machine, so a baseline should be
+recorded on the machine that checks against it.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+
+import bulk_io
+import lazy
+import normalize
+import reductions
+import russian_peasant
+from floating_offset import ABC, ABCMethods
+
+#seconds per call of statement, taking the best of repeat runs of number calls each
+def time_per_call(statement, number = 10000, repeat = 5):
+    return min(timeit.repeat(statement, number = number, repeat = repeat))/number
+
+#prints rows of (label, seconds per call) with the times in nanoseconds
+def print_table(title, rows):
+    print(title)
+    width = max(len(label) for label, _ in rows)
+    for label, seconds in rows:
+        print("  " + label.ljust(width) + "  " + format(seconds*1e9, ".0f").rjust(10) + " ns")
+    print()
+
+#division and modulo on the A field, the B field and the rational layout, against Python int //
+def division_benchmark(number = 10000):
+    I64 = ABC("Signed 64-Bit Integer", 64, 64)
+    U64 = ABC("Unsigned 64-Bit Integer", 0, 64)
+    Rational = ABC("Rational", 32, 62)
+    dividend, divisor = 1234567890123, 987654
+    i0, i1 = I64(dividend), I64(divisor)
+    u0, u1 = U64(b_val = dividend), U64(b_val = divisor)
+    r0, r1 = Rational(355, 113, -1), Rational(-22, 7, -1)
+    return [("python int //", time_per_call(lambda: dividend // divisor, number)),
+            ("python int %", time_per_call(lambda: dividend % divisor, number)),
+            ("I64 //", time_per_call(lambda: i0 // i1, number)),
+            ("I64 %", time_per_call(lambda: i0 % i1, number)),
+            ("U64 //", time_per_call(lambda: u0 // u1, number)),
+            ("U64 %", time_per_call(lambda: u0 % u1, number)),
+            ("Rational /", time_per_call(lambda: r0 / r1, number))]
+
+#cost of the field arithmetic of integer and radical layouts at each vector size
+#the radicals all share one B so that their sums and products stay on the A field
+def width_benchmark(widths = (8, 16, 32, 64, 128, 256, 1024), number = 10000):
+    rows = []
+    for width in widths:
+        Integer = ABC("Signed " + str(width) + "-Bit Integer", width, width, width)
+        Radical = ABC(str(width) + "-Bit Radical", width//4, width*3//4, width)
+        i0, i1 = Integer(Integer.a_extrema[1]//3), Integer(-7)
+        root = min(2, Radical.c_extrema[1])
+        r0, r1 = Radical(1, Radical.b_extrema[1], root), Radical(-1, Radical.b_extrema[1], root)
+        label = str(width) + "-bit "
+        rows += [(label + "integer +", time_per_call(lambda: i0 + i1, number)),
+                 (label + "integer *", time_per_call(lambda: i0*i1, number)),
+                 (label + "integer ==", time_per_call(lambda: i0 == i1, number)),
+                 (label + "radical +", time_per_call(lambda: r0 + r1, number)),
+                 (label + "radical *", time_per_call(lambda: r0*r1, number)),
+                 (label + "radical <", time_per_call(lambda: r0 < r1, number))]
+    return rows
+
+#the generated per-layout kernels against the generic ABCMethods functions they replace
+def kernel_benchmark(number = 10000):
+    rows = []
+    for label, cls, x, y in (("I64", ABC("Signed 64-Bit Integer", 64, 64), (56,), (-26,)),
+                             ("U64", ABC("Unsigned 64-Bit Integer", 0, 64), (1, 56), (1, 26)),
+                             ("Radical", ABC("Radical", 16, 48), (3, 2, 2), (-5, 2, 2))):
+        x, y = cls(*x), cls(*y)
+        rows += [(label + " + generic", time_per_call(lambda: ABCMethods.addition(x, y), number)),
+                 (label + " + kernel", time_per_call(lambda: x + y, number)),
+                 (label + " * generic", time_per_call(lambda: ABCMethods.multiplication(x, y), number)),
+                 (label + " * kernel", time_per_call(lambda: x*y, number)),
+                 (label + " == generic", time_per_call(lambda: ABCMethods.equals(x, y), number)),
+                 (label + " == kernel", time_per_call(lambda: x == y, number))]
+    return rows
+
+#summing a list of values per element, allocating a new total with + or updating one with +=
+def accumulation_benchmark(count = 1000, number = 100):
+    I64 = ABC("Signed 64-Bit Integer", 64, 64)
+    values = [I64(k) for k in range(count)]
+    def accumulate():
+        total = I64(0)
+        for value in values:
+            total = total + value
+        return total
+    def accumulate_in_place():
+        total = I64(0)
+        for value in values:
+            total += value
+        return total
+    return [("I64 total = total + value", time_per_call(accumulate, number)/count),
+            ("I64 total += value", time_per_call(accumulate_in_place, number)/count)]
+
+#a chain of sums and a chain of products per term, and a sum sharing one product, evaluated
+#eagerly and through a lazy graph
+def lazy_benchmark(count = 100, number = 200):
+    Radical = ABC("Radical", 16, 48)
+    terms = [Radical(k % 7 - 3, 2, 2) for k in range(count)]
+    def eager(operation):
+        total = terms[0]
+        for term in terms[1:]:
+            total = operation(total, term)
+        return total
+    def fused(operation):
+        total = lazy.lazy(terms[0])
+        for term in terms[1:]:
+            total = operation(total, term)
+        return total.evaluate()
+    #a sum of terms that all multiply by the same mixed-form product x*y, which eager
+    #evaluation multiplies out again for every term and the lazy graph only once
+    x, y = Radical(3, 2, 2), Radical(5, 3, 3)
+    scales = [Radical(k % 7 + 1, 1, 1) for k in range(count//5)]
+    def shared_eager():
+        total = scales[0]*(x*y)
+        for scale in scales[1:]:
+            total = total + scale*(x*y)
+        return total
+    def shared_lazy():
+        product = lazy.lazy(x)*y
+        total = lazy.lazy(scales[0])*product
+        for scale in scales[1:]:
+            total = total + lazy.lazy(scale)*product
+        return total.evaluate()
+    add = lambda x, y: x + y
+    multiply = lambda x, y: x*y
+    return [("Radical sum, eager", time_per_call(lambda: eager(add), number)/count),
+            ("Radical sum, lazy", time_per_call(lambda: fused(add), number)/count),
+            ("Radical product, eager", time_per_call(lambda: eager(multiply), number)/count),
+            ("Radical product, lazy", time_per_call(lambda: fused(multiply), number)/count),
+            ("Radical shared product, eager", time_per_call(shared_eager, number//10)/len(scales)),
+            ("Radical shared product, lazy", time_per_call(shared_lazy, number//10)/len(scales))]
+
+#from_float into a 16-bit layout through its table and into wide layouts through the
+#search of their value families, and the bulk quantize of the 16-bit layout per value
+def quantization_benchmark(count = 1000, number = 5):
+    import random
+    import quantize
+    Narrow = ABC("16-Bit Radical", 6, 13, 16)
+    Rational = ABC("Rational", 32, 62)
+    Radical = ABC("Radical", 16, 48)
+    generator = random.Random(0)
+    floats = [generator.uniform(-50, 50) for _ in range(count)]
+    #the table is built on first use, which is not what is being timed
+    quantize.quantize(Narrow, floats[:1])
+    rows = [(cls.__name__ + " from_float", time_per_call(lambda: [cls.from_float(x) for x in floats], number)/count)
+            for cls in (Narrow, Rational, Radical)]
+    bulk = floats*100
+    rows.append((Narrow.__name__ + " quantize per value", time_per_call(lambda: quantize.quantize(Narrow, bulk), number)/len(bulk)))
+    return rows
+
+#operations on an 8-bit and a 16-bit layout before and after lookup_tables are installed
+def table_benchmark(number = 20000):
+    import lookup_tables
+    Narrow = ABC("8-Bit Radical", 3, 6, 8)
+    Wide = ABC("16-Bit Radical", 6, 13, 16)
+    x, y = Narrow(2, 3, -1), Narrow(3, 2, -1)
+    u, v = Wide(1, 4, -2), Wide(1, 2, -1)
+    statements = [("8-bit mixed *", lambda: x*y), ("8-bit +", lambda: x + x), ("8-bit ==", lambda: x == y),
+                  ("16-bit float()", lambda: float(u)), ("16-bit str()", lambda: str(u)),
+                  ("16-bit ==", lambda: u == v), ("16-bit <", lambda: u < v), ("16-bit normalize", lambda: u.normalize())]
+    rows = [(label + ", methods", time_per_call(statement, number)) for label, statement in statements]
+    lookup_tables.install(Narrow)
+    lookup_tables.install(Wide)
+    for _, statement in statements:
+        statement()
+    rows += [(label + ", tables", time_per_call(statement, number)) for label, statement in statements]
+    return rows
+
+#sums, products and dot products per element of values read from an iterator, folded
+#with the operators against the streaming reductions
+def reduction_benchmark(count = 1000, number = 20):
+    I64 = ABC("Signed 64-Bit Integer", 64, 64)
+    Radical = ABC("Radical", 16, 48)
+    def fold(values, operation):
+        values = iter(values)
+        total = next(values)
+        for value in values:
+            total = operation(total, value)
+        return total
+    add = lambda x, y: x + y
+    multiply = lambda x, y: x*y
+    integers = [I64(k) for k in range(count)]
+    radicals = [Radical(k % 7 - 3, 2, 2) for k in range(count)]
+    factors = [Radical(1, k % 3 + 1, 1) for k in range(count)]
+    return [("I64 sum, fold", time_per_call(lambda: fold(iter(integers), add), number)/count),
+            ("I64 sum, fo_sum", time_per_call(lambda: reductions.fo_sum(iter(integers)), number)/count),
+            ("Radical sum, fold", time_per_call(lambda: fold(iter(radicals), add), number)/count),
+            ("Radical sum, fo_sum", time_per_call(lambda: reductions.fo_sum(iter(radicals)), number)/count),
+            ("Radical B product, fold", time_per_call(lambda: fold(iter(factors), multiply), number)/count),
+            ("Radical B product, fo_prod", time_per_call(lambda: reductions.fo_prod(iter(factors)), number)/count),
+            ("I64 dot, fold", time_per_call(lambda: fold((x*y for x, y in zip(integers, integers)), add), number)/count),
+            ("I64 dot, fo_dot", time_per_call(lambda: reductions.fo_dot(iter(integers), iter(integers)), number)/count)]
+
+#packing rows of (A, B, C) triples one instance at a time against bulk_io's chunked encoder
+def ingestion_benchmark(rows = 10000, number = 10):
+    Rational = ABC("Rational", 32, 62)
+    triples = [(i - rows//2, i + 1, -1) for i in range(rows)]
+    lines = [str(a) + "," + str(b) + "," + str(c) for a, b, c in triples]
+    return [("construct per row", time_per_call(lambda: [Rational(*triple) for triple in triples], number)/rows),
+            ("bulk_io.encode per row", time_per_call(lambda: list(bulk_io.encode(Rational, triples)), number)/rows),
+            ("bulk_io.read csv per row", time_per_call(lambda: list(bulk_io.read(Rational, lines, ",")), number)/rows)]
+
+#seconds a fresh interpreter takes to run statement, taking the best of repeat runs
+#the statement is timed inside the interpreter, so its own start-up is not counted
+def time_fresh(statement, repeat = 10):
+    directory = os.path.dirname(os.path.abspath(__file__))
+    code = "import time\nstart = time.perf_counter()\n" + statement + "\nprint(time.perf_counter() - start)"
+    return min(float(subprocess.run([sys.executable, "-c", code], cwd = directory, check = True,
+                                    capture_output = True, text = True).stdout)
+               for _ in range(repeat))
+
+#start-up cost of a worker process: importing each module in a fresh interpreter and
+#building the common layouts from the registry
+def startup_benchmark(repeat = 10):
+    return [(statement, time_fresh(statement, repeat))
+            for statement in ("import normalize",
+                              "import floating_offset",
+                              "import bulk_io",
+                              "import offset_file",
+                              "from floating_offset import I64, U64, Rational")]
+
+#the layouts of the suite as (label, ABC arguments, first operand, second operand)
+#the operands share B and C, or A and C, so the field-wise case of every operation is timed
+SUITE_LAYOUTS = (("I8", ("Signed 8-Bit Integer", 8, 8, 8), (56,), (-26,)),
+                 ("I64", ("Signed 64-Bit Integer", 64, 64), (56,), (-26,)),
+                 ("U64", ("Unsigned 64-Bit Integer", 0, 64), (1, 56), (1, 26)),
+                 ("I128", ("Signed 128-Bit Integer", 128, 128, 128), (56,), (-26,)),
+                 ("Rational", ("Rational", 32, 62), (355, 113, -1), (-22, 113, -1)),
+                 ("Radical", ("Radical", 16, 48), (3, 2, 2), (-5, 2, 2)),
+                 ("Mixed", ("Mixed", 20, 40), (1, 5, 3), (1, 7, 3)),
+                 ("Radical256", ("256-Bit Radical", 64, 192, 256), (3, 2**127 - 1, 2), (-5, 2**127 - 1, 2)))
+
+#(A, B, C) triples for normalize and multiply: a perfect power, a radical and a large radicand
+SUITE_TRIPLES = ((2, 8, 2), (3, 2**4*3**5*7, 3), (1, 2**61 - 1, -2))
+
+#the reference work that suite timings are divided by: a Python call doing int arithmetic
+def reference_work(x, y):
+    return (x + y) & 0xFFFF
+
+#seconds per call of statement and its ratio to the reference work
+#the two are timed in alternating short runs and the ratio of each pair is kept, so a
+#change of machine speed partway through affects both sides of most pairs alike
+def time_relative(statement, number, repeat = 15):
+    number = max(1, number//repeat)
+    times = []
+    ratios = []
+    for _ in range(repeat):
+        reference = timeit.timeit(lambda: reference_work(56, -26), number = number)
+        seconds = timeit.timeit(statement, number = number)
+        times.append(seconds/number)
+        ratios.append(seconds/reference)
+    ratios.sort()
+    return min(times), ratios[len(ratios)//2]
+
+#a call adding y in place into a value of cls that is put back to word first, so every call
+#of the benchmark takes the same path instead of adding into a total that drifts
+def in_place_adder(cls, word, y):
+    total = ABCMethods.from_word(cls, word)
+    def add():
+        total.word = word
+        return total.__iadd__(y)
+    return add
+
+#(seconds per call, ratio to the reference work) of every operation of the suite, keyed by a
+#name of the form "layout operation"
+#normalize is timed through its uncached function, so every call does the whole job
+def suite_benchmark(number = 6000):
+    results = {}
+    for label, arguments, x, y in SUITE_LAYOUTS:
+        cls = ABC(*arguments)
+        x, y = cls(*x), cls(*y)
+        for operation, statement in (("construct", lambda: cls(*ABCMethods.values(x))),
+                                     ("represent", lambda: ABCMethods.represent(x)),
+                                     ("bitwise_or", lambda: x | y),
+                                     ("bitwise_and", lambda: x & y),
+                                     ("bitwise_xor", lambda: x ^ y),
+                                     ("bitwise_not", lambda: ~x),
+                                     ("equals", lambda: x == y),
+                                     ("compare", lambda: x < y),
+                                     ("addition", lambda: x + y),
+                                     ("subtraction", lambda: x - y),
+                                     ("multiplication", lambda: x*y),
+                                     ("in_place_addition", in_place_adder(cls, x.word, y)),
+                                     ("normalize", lambda: x.normalize())):
+            results[label + " " + operation] = time_relative(statement, number)
+    for A, B, C in SUITE_TRIPLES:
+        label = "normalize " + str(A) + "*" + str(B) + "^(1/" + str(C) + ")"
+        results[label + " norm"] = time_relative(lambda: normalize.normalize.__wrapped__(A, B, C), number//10)
+        results[label + " multiply"] = time_relative(lambda: normalize.multiply(A, B, C, A, B, C), number//10)
+    li1 = ABCMethods.int_to_bits(1234567, 64)
+    li2 = ABCMethods.int_to_bits(7654321, 64)
+    results["russian_peasant signed"] = time_relative(lambda: russian_peasant.russian_peasant_signed(li1, li2), number)
+    results["russian_peasant unsigned"] = time_relative(lambda: russian_peasant.russian_peasant_unsigned(li1, li2), number)
+    results["russian_peasant divide"] = time_relative(lambda: russian_peasant.divide_unsigned(li2, li1), number)
+    return results
+
+#the suite results as a JSON-ready dict, with the times in nanoseconds and the ratios
+#to the reference work
+def report(results):
+    return {"python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": {name: seconds*1e9 for name, (seconds, _) in results.items()},
+            "relative": {name: ratio for name, (_, ratio) in results.items()}}
+
+#the operations of report whose ratio to the reference work grew by more than threshold
+#over baseline, as a list of (name, baseline ratio, ratio)
+#operations missing from either side are skipped
+def regressions(report, baseline, threshold):
+    slower = []
+    for name, ratio in report["relative"].items():
+        before = baseline["relative"].get(name)
+        if before is not None and ratio > before*(1 + threshold):
+            slower.append((name, before, ratio))
+    return slower
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Benchmarks for floating-offset numbers.")
+    parser.add_argument("--suite", action = "store_true", help = "run only the suite of every operation and layout")
+    parser.add_argument("--json", metavar = "PATH", help = "write the suite results to PATH as JSON")
+    parser.add_argument("--baseline", metavar = "PATH", help = "fail on regressions against the suite results in PATH")
+    parser.add_argument("--threshold", type = float, default = 0.25, help = "allowed slowdown as a fraction (default 0.25)")
+    parser.add_argument("--number", type = int, default = 6000, help = "calls per operation in the suite")
+    arguments = parser.parse_args()
+    if not (arguments.suite or arguments.json or arguments.baseline):
+        print_table("division", division_benchmark())
+        print_table("ingestion", ingestion_benchmark())
+        print_table("width", width_benchmark())
+        print_table("kernels", kernel_benchmark())
+        print_table("accumulation", accumulation_benchmark())
+        print_table("lazy", lazy_benchmark())
+        print_table("quantization", quantization_benchmark())
+        print_table("lookup tables", table_benchmark())
+        print_table("reductions", reduction_benchmark())
+        print_table("startup", startup_benchmark())
+    results = suite_benchmark(arguments.number)
+    print_table("suite", sorted((name, seconds) for name, (seconds, _) in results.items()))
+    if arguments.json:
+        with open(arguments.json, "w") as file:
+            json.dump(report(results), file, indent = 2, sort_keys = True)
+    if arguments.baseline:
+        with open(arguments.baseline) as file:
+            slower = regressions(report(results), json.load(file), arguments.threshold)
+        for name, before, ratio in slower:
+            print("regression: " + name + " " + format(before, ".2f") + "x -> " + format(ratio, ".2f") + "x the reference work")
+        if slower:
+            sys.exit(1)
@@ -0,0 +1,106 @@
+"""
+Streaming construction of floating-offset numbers from text. Rows of A, B and C values
+are read from a whitespace-separated text file, a CSV file or any iterable of lines or
+triples, a chunk at a time, and packed straight into words without building an instance
+per row. Every chunk is range-checked against the type's a_extrema, b_extrema and
+c_extrema with one min and max per column, so memory stays bounded by the chunk size
+whatever the size of the input.
+
+The words come out as lists, one per chunk, ready for ABCMethods.from_word, for
+FloatingOffsetArray or for offset_file, or they can be written into a preallocated
+array with fill(). write_text() goes the other way and writes values back out as rows.
+"""
+
+import itertools
+
+from floating_offset import ABCMethods, OverflowException
+
+#rows read and packed at a time
+CHUNK_SIZE = 1 << 16
+
+#the lines of source, which may be a path, an open text file or any iterable of lines
+def lines_of(source):
+    if isinstance(source, str):
+        with open(source, newline = "") as file:
+            yield from file
+    else:
+        yield from source
+
+#yields (A, B, C) tuples of ints parsed from lines
+#a delimiter of None splits on whitespace, any other delimiter is read as CSV
+#blank lines and lines starting with # are skipped
+def parse(lines, delimiter = None):
+    if delimiter is None:
+        rows = (line.split() for line in lines)
+    else:
+        import csv
+        rows = csv.reader(lines, delimiter = delimiter)
+    for line_number, fields in enumerate(rows, 1):
+        if not fields or fields[0].lstrip().startswith("#"):
+            continue
+        if len(fields) != 3:
+            raise ValueError("line " + str(line_number) + ": expected 3 values, got " + str(len(fields)))
+        yield (int(fields[0]), int(fields[1]), int(fields[2]))
+
+#yields lists of at most size items of iterable
+def chunked(iterable, size = CHUNK_SIZE):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+#the words of abc_type holding the (A, B, C) tuples in rows
+#the whole chunk is range-checked at once, and only a chunk that fails is searched for
+#the first row out of range, which is reported in the OverflowException
+def pack_chunk(abc_type, rows):
+    if not rows:
+        return []
+    a_vals, b_vals, c_vals = zip(*rows)
+    for values, extrema in ((a_vals, abc_type.a_extrema), (b_vals, abc_type.b_extrema), (c_vals, abc_type.c_extrema)):
+        if min(values) < extrema[0] or max(values) > extrema[1]:
+            for index, value in enumerate(values):
+                if not extrema[0] <= value <= extrema[1]:
+                    raise OverflowException("row " + str(index) + " of the chunk: " + str(rows[index]))
+    a_mask, a_shift = abc_type.a_mask, abc_type.a_shift
+    b_mask, b_shift = abc_type.b_mask, abc_type.b_shift
+    c_mask = abc_type.c_mask
+    return [(a & a_mask) << a_shift | (b & b_mask) << b_shift | (c & c_mask) for a, b, c in rows]
+
+#yields lists of words of abc_type for an iterable of (A, B, C) tuples
+def encode(abc_type, triples, chunk_size = CHUNK_SIZE):
+    for rows in chunked(triples, chunk_size):
+        yield pack_chunk(abc_type, rows)
+
+#yields lists of words of abc_type for the rows of source, read chunk_size lines at a time
+def read(abc_type, source, delimiter = None, chunk_size = CHUNK_SIZE):
+    return encode(abc_type, parse(lines_of(source), delimiter), chunk_size)
+
+#yields instances of abc_type for the rows of source
+def read_values(abc_type, source, delimiter = None, chunk_size = CHUNK_SIZE):
+    for words in read(abc_type, source, delimiter, chunk_size):
+        for word in words:
+            yield ABCMethods.from_word(abc_type, word)
+
+#writes the words for the rows of source into out, which may be a list, an array.array,
+#a NumPy uint64 array or any other sequence that takes slice assignment
+#returns the number of rows written, raising ValueError if out is too short
+def fill(abc_type, source, out, delimiter = None, chunk_size = CHUNK_SIZE):
+    count = 0
+    for words in read(abc_type, source, delimiter, chunk_size):
+        if count + len(words) > len(out):
+            raise ValueError("more than " + str(len(out)) + " rows in source")
+        out[count:count + len(words)] = words
+        count += len(words)
+    return count
+
+#writes the A, B and C values of every instance in values to target, one row each
+#target may be a path or an open text file, and a delimiter of None separates with spaces
+def write_text(target, values, delimiter = ",", chunk_size = CHUNK_SIZE):
+    if isinstance(target, str):
+        with open(target, "w", newline = "") as file:
+            return write_text(file, values, delimiter, chunk_size)
+    separator = " " if delimiter is None else delimiter
+    for chunk in chunked(values, chunk_size):
+        target.write("".join(separator.join(map(str, ABCMethods.values(value))) + "\n" for value in chunk))
@@ -6,11 +6,17 @@ in two's complement form. This allows for the representation of a
 surprising amount of integers, rational numbers and irrational numbers.
 The ordering is big-endian.
 
-The number is represented by a bit vector in the ABC class. The
-length of the vector is currently 64-bit, but that will change
-later. The ABC constructor takes two arguments representing
-offsets inside the bit vector which delineate the values A, B,
-and C. For example, ABC("abc", 12, 57) will make it so that the A value
+The number is represented by a bit vector in the ABC class, packed
+into a single Python int (the "word") whose most significant bit is
+the first bit of the vector. to_bytes() writes the word out in the
+same big-endian order. The length of the vector is given by the
+vector_size argument of ABC, 64 bits by default. Any width works,
+from 8-bit layouts up to 128, 256 bits and beyond: every field is
+read and written with a shift and a mask of the word, so an addition,
+subtraction or field multiplication is a handful of Python int
+operations at any width, never a loop over the bits. The ABC
+constructor takes two arguments representing offsets inside the bit
+vector which delineate the values A, B, and C. For example, ABC("abc", 12, 57) will make it so that the A value
 is composed of the first 12 bits, the B value is composed of the
 next 45 bits (12 to 57), and the C value is composed of the final
 7 bits (57 to 64).
@@ -42,6 +48,13 @@ own right). These different types are therefore incompatible in their
 operations.
 """
 
+import functools
+import math
+import sys
+
+import kernels
+import normalize
+
 #thrown when a_val, b_val, or c_val is too large
 class OverflowException(Exception):
     pass
@@ -63,11 +76,90 @@ This is a simple metaclass used for the purpose of modifying the behavior of typ
 This metaclass allows floating-offset numbers to check compatibility using the
 "==" operator and ensures type consistency. Two floating-offset numbers are of the
 same type if they have the same offsets, so type(floating_offset1) == type(floating_offset2)
-is enforced by this metaclass.
+is enforced by this metaclass. Since ABC interns its types, one layout is one type
+object, and equality of types is identity. Types are hashable, so they can be used
+as dict keys for dispatch.
+
+Types of different layouts only mix through conversion. The field-remapping function
+for each (source, target) pair is compiled once and kept on the metaclass, and
+promote() opts a pair of types into converting implicitly inside binary operations.
+
+Modules that swap methods of a type at run time (profiling, lookup_tables, backends) do
+it through layers: add_layer() puts a method over an attribute on behalf of an owner,
+remove_layer() takes exactly that owner's method away again wherever it sits among the
+layers, and layer_below() gives the method an owner's layer covers, which is what it
+should fall back to. So owners can come and go in any order without putting back a
+method another owner has since replaced or taken away.
 """
 class EqualityMeta(type):
+
+    #every type created by ABC, keyed by (offset0, offset1, vector_size, overflow)
+    interned = {}
+
+    #compiled word converters, keyed by (source type, target type)
+    converters = {}
+
+    #implicit promotions that have been opted into, as (source type, target type)
+    promotions = set()
+
+    #functions called with every type ABC creates, once it is complete
+    creation_hooks = []
+
+    #the methods swapped in over the attributes of types, keyed by (type, attribute), as lists
+    #of (owner, method) from the method the type was created with (owner None) up
+    layers = {}
+
     def __eq__(self, other):
-        return self.offsets_string == other.offsets_string
+        return self is other
+
+    __hash__ = type.__hash__
+
+    #the function mapping words of this type to words of target, compiled on first use
+    def converter(self, target):
+        key = (self, target)
+        if key not in EqualityMeta.converters:
+            EqualityMeta.converters[key] = ABCMethods.compile_converter(self, target)
+        return EqualityMeta.converters[key]
+
+    #lets values of this type be converted to target when combined with values of target
+    def promote(self, target):
+        EqualityMeta.promotions.add((self, target))
+
+    #makes method the attribute of this type on behalf of owner, over the layers already
+    #there, or in place of the layer owner already has
+    def add_layer(self, attribute, owner, method):
+        key = (self, attribute)
+        if key not in EqualityMeta.layers:
+            EqualityMeta.layers[key] = [(None, self.__dict__[attribute])]
+        stack = EqualityMeta.layers[key]
+        owners = [layer_owner for layer_owner, _ in stack]
+        if owner in owners:
+            stack[owners.index(owner)] = (owner, method)
+        else:
+            stack.append((owner, method))
+        setattr(self, attribute, stack[-1][1])
+
+    #takes the layer of owner off the attribute of this type, if it has one
+    def remove_layer(self, attribute, owner):
+        key = (self, attribute)
+        stack = [layer for layer in EqualityMeta.layers.get(key, []) if layer[0] != owner]
+        if key not in EqualityMeta.layers or len(stack) == len(EqualityMeta.layers[key]):
+            return
+        setattr(self, attribute, stack[-1][1])
+        if len(stack) == 1:
+            del EqualityMeta.layers[key]
+        else:
+            EqualityMeta.layers[key] = stack
+
+    #the method the layer of owner covers, or the current method when owner has no layer
+    def layer_below(self, attribute, owner):
+        stack = EqualityMeta.layers.get((self, attribute))
+        if stack is None:
+            return self.__dict__[attribute]
+        for index, (layer_owner, _) in enumerate(stack):
+            if layer_owner == owner:
+                return stack[index - 1][1]
+        return stack[-1][1]
 
 """
 This is a namespace for the methods that will be contained within any instance of
@@ -81,6 +173,20 @@ class ABCMethods:
     NO_EXTREMES = (1, 1)
     MAPPING = {True: "1", False: "0"}
     ANTI_MAPPING = {"1": True, "0": False}
+
+    #overflow modes for products that do not fit their field
+    WRAP = "wrap"
+    SATURATE = "saturate"
+    RAISE = "raise"
+    OVERFLOW_MODES = (WRAP, SATURATE, RAISE)
+
+    #the attribute of a type that each kernel generated by kernels.build replaces
+    KERNEL_ATTRIBUTES = {"addition": "__add__", "subtraction": "__sub__", "multiplication": "__mul__",
+                         "in_place_addition": "__iadd__", "in_place_subtraction": "__isub__",
+                         "in_place_multiplication": "__imul__",
+                         "equals": "__eq__", "value_hash": "__hash__",
+                         "less": "__lt__", "less_equal": "__le__", "greater": "__gt__", "greater_equal": "__ge__",
+                         "a_value": "a", "b_value": "b", "c_value": "c"}
     
     #returns the lowest and highest values a signed integer with a bit vector having
     #the given length can take, in the tuple form (minimum value, maximum value)
@@ -96,70 +202,231 @@ class ABCMethods:
             return ABCMethods.NO_EXTREMES
         return (0, 2**length - 1)
 
-    #implementation of __init__ for floating-offset numbers
-    def construct(self, a_val, b_val, c_val):
-        self.bit_vector = [False]*self.vector_size  
-        if not (self.a_extrema[0] <= a_val <= self.a_extrema[1] and
-                self.b_extrema[0] <= b_val <= self.b_extrema[1] and
-                self.c_extrema[0] <= c_val <= self.c_extrema[1]):
+    #returns the two's complement value of the given field bits
+    def to_signed(bits, length):
+        if length == 0:
+            return 1
+        if bits >> (length - 1):
+            return bits - (1 << length)
+        return bits
+
+    #creates an instance of cls directly from a packed word, bypassing construct
+    def from_word(cls, word):
+        result = object.__new__(cls)
+        result.word = word
+        return result
+
+    #the A, B and C field bits of the packed word, in the tuple form (A, B, C)
+    def fields(self):
+        return (self.word >> self.a_shift,
+                (self.word >> self.b_shift) & self.b_mask,
+                self.word & self.c_mask)
+
+    #implementation of the a, b and c properties, reading one field of the word each
+    def a_value(self):
+        return ABCMethods.to_signed(self.word >> self.a_shift, self.a_len)
+
+    def b_value(self):
+        return (self.word >> self.b_shift) & self.b_mask if self.b_len != 0 else 1
+
+    def c_value(self):
+        return ABCMethods.to_signed(self.word & self.c_mask, self.c_len)
+
+    #the A, B and C values of the floating-offset number, in the tuple form (A, B, C)
+    def values(self):
+        a_bits, b_bits, c_bits = ABCMethods.fields(self)
+        return (ABCMethods.to_signed(a_bits, self.a_len),
+                1 if self.b_len == 0 else b_bits,
+                ABCMethods.to_signed(c_bits, self.c_len))
+
+    #bytes used by one instance of cls: the slotted object plus the largest word it can hold
+    def footprint(cls):
+        return sys.getsizeof(object.__new__(cls)) + sys.getsizeof(cls.vector_mask)
+
+    #converts a list of bools, most significant bit first, to the unsigned int it holds
+    def bits_to_int(bit_vector):
+        value = 0
+        for bit in bit_vector:
+            value = value << 1 | bit
+        return value
+
+    #converts the low length bits of an int to a list of bools, most significant bit first
+    def int_to_bits(value, length):
+        return [bool((value >> bit_index) & 1) for bit_index in range(length)[::-1]]
+
+    #list-of-bools view of the packed word, most significant bit first
+    def bits(self):
+        return ABCMethods.int_to_bits(self.word, self.vector_size)
+
+    #the packed word as byte_size big-endian bytes, so the first bit of the vector is the
+    #first bit after the padding that fills out the first byte
+    def to_bytes(self):
+        return self.word.to_bytes(self.byte_size, "big")
+
+    #creates an instance of cls from the bytes written by to_bytes
+    def from_bytes(cls, data):
+        if len(data) != cls.byte_size:
+            raise ValueError("expected " + str(cls.byte_size) + " bytes, got " + str(len(data)))
+        word = int.from_bytes(data, "big")
+        if word > cls.vector_mask:
+            raise ValueError("padding bits are set")
+        return ABCMethods.from_word(cls, word)
+
+    #brings an exact field value into range according to the overflow mode and returns its field bits
+    def fit_field(value, extrema, mask, overflow):
+        if extrema[0] <= value <= extrema[1] or overflow == ABCMethods.WRAP:
+            return value & mask
+        if overflow == ABCMethods.SATURATE:
+            return (extrema[0] if value < extrema[0] else extrema[1]) & mask
+        raise OverflowException()
+
+    #packs A, B and C values into a word of type cls
+    def pack(cls, a_val, b_val, c_val):
+        if not (cls.a_extrema[0] <= a_val <= cls.a_extrema[1] and
+                cls.b_extrema[0] <= b_val <= cls.b_extrema[1] and
+                cls.c_extrema[0] <= c_val <= cls.c_extrema[1]):
             raise OverflowException()
 
-        #modification of internal bit_vector to match passed_in values
-        if self.a_len != 0:
-            a_bitstring = [ABCMethods.ANTI_MAPPING[bit] for bit in list(bin(a_val & self.a_val_max_binary))[2:]]
-            self.bit_vector[self.offset0 - len(a_bitstring):self.offset0] = a_bitstring
-        if self.b_len != 0:
-            b_bitstring = [ABCMethods.ANTI_MAPPING[bit] for bit in list(bin(b_val))[2:]]
-            self.bit_vector[self.offset1 - len(b_bitstring):self.offset1] = b_bitstring
-        if self.c_len != 0:
-            c_bitstring = [ABCMethods.ANTI_MAPPING[bit] for bit in list(bin(c_val))[2:]]
-            self.bit_vector[len(self.bit_vector) - len(c_bitstring):] = c_bitstring
+        #fields with no bits have a zero mask, so they contribute nothing
+        return ((a_val & cls.a_mask) << cls.a_shift |
+                (b_val & cls.b_mask) << cls.b_shift |
+                (c_val & cls.c_mask))
+
+    #packs a value given as a normal (A, B, C) triple into a word of type cls, also trying
+    #the equivalent forms that a layout with missing or narrow fields can still hold
+    def fit(cls, a_val, b_val, c_val):
+        candidates = [(a_val, b_val, c_val)]
+        if b_val == 1:
+            #1^(1/C) is 1 for any C, and an integer can also live in the B field
+            candidates += [(a_val, 1, c) for c in (1, -1, cls.c_extrema[1], cls.c_extrema[0]) if c != 0]
+            if a_val >= 0:
+                candidates.append((1, a_val, 1))
+        elif c_val > 0 and a_val > 1 and cls.a_len == 0 and a_val.bit_length()*c_val <= cls.b_len + 1:
+            #a layout without an A field can take a positive A under the root
+            candidates.append((1, a_val**c_val*b_val, c_val))
+        for a, b, c in candidates:
+            if cls.a_extrema[0] <= a <= cls.a_extrema[1] and \
+               cls.b_extrema[0] <= b <= cls.b_extrema[1] and \
+               cls.c_extrema[0] <= c <= cls.c_extrema[1]:
+                return ABCMethods.pack(cls, a, b, c)
+        raise OverflowException()
+
+    #the word of the normal form of the value held in word, or word itself when the normal
+    #form does not fit cls or the value is undefined (C of 0)
+    #each type wraps this in its own LRU cache as normal_word
+    def normalized_word(cls, word):
+        try:
+            return ABCMethods.fit(cls, *normalize.normalize(*ABCMethods.values(ABCMethods.from_word(cls, word))))
+        except (OverflowException, ZeroDivisionError):
+            return word
+
+    #implementation of normalize(), returning the same value in normal form
+    def canonicalize(self):
+        return ABCMethods.from_word(type(self), type(self).normal_word(self.word))
+
+    #builds the function converting words of type source to words of type target
+    #fields are remapped with shifts and masks when every value fits its target field,
+    #otherwise the normal form is fitted into the target layout
+    def compile_converter(source, target):
+        if source == target:
+            return lambda word: word
+        a_shift, a_len = source.a_shift, source.a_len
+        b_shift, b_mask, b_len = source.b_shift, source.b_mask, source.b_len
+        c_mask, c_len = source.c_mask, source.c_len
+        (a_min, a_max), (b_min, b_max), (c_min, c_max) = target.a_extrema, target.b_extrema, target.c_extrema
+        def convert(word):
+            a_val = ABCMethods.to_signed(word >> a_shift, a_len)
+            b_val = (word >> b_shift) & b_mask if b_len != 0 else 1
+            c_val = ABCMethods.to_signed(word & c_mask, c_len)
+            if a_min <= a_val <= a_max and b_min <= b_val <= b_max and c_min <= c_val <= c_max:
+                return ((a_val & target.a_mask) << target.a_shift |
+                        (b_val & target.b_mask) << target.b_shift |
+                        (c_val & target.c_mask))
+            try:
+                return ABCMethods.fit(target, *normalize.normalize(a_val, b_val, c_val))
+            except ZeroDivisionError:
+                raise OverflowException()
+        return convert
+
+    #converts value to an equal value of type target, raising OverflowException if target cannot hold it
+    def convert(value, target):
+        return ABCMethods.from_word(target, type(value).converter(target)(value.word))
+
+    #returns self and other as values of one type, converting one of them if their types
+    #differ and a promotion between them has been opted into
+    def coerce(self, other):
+        other_type = type(other)
+        if type(self) is other_type:
+            return self, other
+        if (other_type, type(self)) in EqualityMeta.promotions:
+            return self, ABCMethods.convert(other, type(self))
+        if (type(self), other_type) in EqualityMeta.promotions:
+            return ABCMethods.convert(self, other_type), other
+        raise TypeMismatchException()
+
+    #implementation of __init__ for floating-offset numbers
+    def construct(self, a_val, b_val, c_val):
+        self.word = ABCMethods.pack(type(self), a_val, b_val, c_val)
 
     #implementation of | operator
     def bitwise_or(self, other):
-        if type(self) != type(other):
-            raise TypeMismatchException()
-        result = type(self)()
-        for bit_index in range(len(self.bit_vector)):
-            result.bit_vector[bit_index] = self.bit_vector[bit_index] or other.bit_vector[bit_index]
-        return result
+        self, other = ABCMethods.coerce(self, other)
+        return ABCMethods.from_word(type(self), self.word | other.word)
 
     #implementation of & operator
     def bitwise_and(self, other):
-        if type(self) != type(other):
-            raise TypeMismatchException()
-        result = type(self)()
-        for bit_index in range(len(self.bit_vector)):
-            result.bit_vector[bit_index] = self.bit_vector[bit_index] and other.bit_vector[bit_index]
-        return result
+        self, other = ABCMethods.coerce(self, other)
+        return ABCMethods.from_word(type(self), self.word & other.word)
 
     #implementation of ^ operator
     def bitwise_xor(self, other):
-        if type(self) != type(other):
-            raise TypeMismatchException()
-        result = type(self)()
-        for bit_index in range(len(self.bit_vector)):
-            result.bit_vector[bit_index] = self.bit_vector[bit_index] ^ other.bit_vector[bit_index]
-        return result
+        self, other = ABCMethods.coerce(self, other)
+        return ABCMethods.from_word(type(self), self.word ^ other.word)
 
     #implementation of ~ operator
     def bitwise_not(self):
-        result = type(self)()
-        for bit_index in range(len(self.bit_vector)):
-            result.bit_vector[bit_index] = not self.bit_vector[bit_index]
-        return result
+        return ABCMethods.from_word(type(self), ~self.word & self.vector_mask)
 
     #implementation of == operator
+    #numbers are equal when their words match or their normal forms do, and values that
+    #clearly differ are told apart before anything is factored
+    #values of types without a promotion between them are never equal, so that values of
+    #different layouts whose hashes collide can share a set or dict; a value that cannot
+    #be converted to the type of the other is not equal to it either
     def equals(self, other):
-        #normalize?
-        if type(self) != type(other):
-            raise TypeMismatchException()
-        for bit_index in range(len(self.bit_vector)):
-            if self.bit_vector[bit_index] != other.bit_vector[bit_index]:
-                return False
-        return True
+        try:
+            self, other = ABCMethods.coerce(self, other)
+        except TypeMismatchException:
+            return NotImplemented
+        except OverflowException:
+            return False
+        if self.word == other.word:
+            return True
+        try:
+            return normalize.equal(*ABCMethods.values(self), *ABCMethods.values(other))
+        except ZeroDivisionError:
+            return False
+
+    #returns -1, 0 or 1 as self is less than, equal to or greater than other, without rounding
+    def compare(self, other):
+        self, other = ABCMethods.coerce(self, other)
+        if self.word == other.word:
+            return 0
+        try:
+            return normalize.compare(*ABCMethods.values(self), *ABCMethods.values(other))
+        except ZeroDivisionError:
+            raise NotImplementedException()
+
+    #implementation of hash(), consistent with ==: equal values have equal normal forms
+    #values without a normal form (C of 0) only equal themselves and hash their fields
+    def value_hash(self):
+        try:
+            return hash(normalize.normalize(*ABCMethods.values(self)))
+        except ZeroDivisionError:
+            return hash(ABCMethods.values(self))
 
     #performs bitwise signed addition
+    #this and the other bit-vector routines below are the reference backend of backends
     def signed_add(bit_vector0, bit_vector1):
         carry = False
         result = []
@@ -171,35 +438,31 @@ class ABCMethods:
 
     #implementation of + operator
     def addition(self, other):
-                               
-        #TODO: normalize a, b values for self and other
-        if type(self) != type(other):
-            raise TypeMismatchException()
-        result = type(self)()
-                               
+
+        self, other = ABCMethods.coerce(self, other)
+        difference = self.word ^ other.word
+
         #if b_vals and c_vals are equal (signed addition)
-        #editing a_val, two's complement
-        if self.bit_vector[self.offset0:self.offset1] == other.bit_vector[self.offset0:self.offset1] and \
-           self.bit_vector[self.offset1:] == other.bit_vector[self.offset1:] and \
-           self.a_len != 0:
-            result.bit_vector[:self.offset0] = ABCMethods.signed_add(self.bit_vector[:self.offset0],
-                                                                     other.bit_vector[:other.offset0])
-            result.bit_vector[self.offset0:] = self.bit_vector[self.offset0:][:]
-                               
+        #editing a_val, two's complement wraps within the field mask
+        if not difference & self.bc_field_mask and self.a_len != 0:
+            a_word = ((self.word & self.a_field_mask) + (other.word & self.a_field_mask)) & self.a_field_mask
+            return ABCMethods.from_word(type(self), a_word | (self.word & self.bc_field_mask))
+
         #if a_vals and c_vals are equal (unsigned addition)
         #editing b_val, no two's complement
-        elif self.bit_vector[:self.offset0] == other.bit_vector[:self.offset0] and \
-           self.bit_vector[self.offset1:] == other.bit_vector[self.offset1:] and \
-           self.b_len != 0:
-            result.bit_vector[self.offset0:self.offset1] = ABCMethods.signed_add(self.bit_vector[self.offset0:self.offset1],
-                                                                                 other.bit_vector[other.offset0:other.offset1])
-            result.bit_vector[:self.offset0] = self.bit_vector[:self.offset0][:]
-            result.bit_vector[self.offset1:] = self.bit_vector[self.offset1:][:]
+        elif not difference & self.ac_field_mask and self.b_len != 0:
+            b_word = ((self.word & self.b_field_mask) + (other.word & self.b_field_mask)) & self.b_field_mask
+            return ABCMethods.from_word(type(self), b_word | (self.word & self.ac_field_mask))
+
+        #mixed forms may still line up once both are normalized, e.g. 2*8^(1/2) + 2^(1/2)
+        #normal forms are fixed points, so this recurses at most once
+        normal_word0 = type(self).normal_word(self.word)
+        normal_word1 = type(self).normal_word(other.word)
+        if normal_word0 != self.word or normal_word1 != other.word:
+            return ABCMethods.addition(ABCMethods.from_word(type(self), normal_word0), ABCMethods.from_word(type(self), normal_word1))
 
         #implement later
-        else:
-            raise NotImplementedException()
-        return result
+        raise NotImplementedException()
 
     #converts number to its two's complement negative
     def invert(bit_vector):
@@ -223,37 +486,30 @@ class ABCMethods:
 
     #implementation of - operator
     def subtraction(self, other):
-                               
-        #TODO: normalize a, b values for self and other
-        if type(self) != type(other):
-            raise TypeMismatchException()
-        result = type(self)()
+
+        self, other = ABCMethods.coerce(self, other)
+        difference = self.word ^ other.word
 
         #if b_vals and c_vals are equal (signed subtraction)
-        #editing a_val, two's complement
-        #essentially just unsigned addition with negative of other's bit vector
-        if self.bit_vector[self.offset0:self.offset1] == other.bit_vector[self.offset0:self.offset1] and \
-           self.bit_vector[self.offset1:] == other.bit_vector[self.offset1:] and \
-           self.a_len != 0:
-            result.bit_vector[:self.offset0] = ABCMethods.signed_add(self.bit_vector[:self.offset0],
-                                                                     ABCMethods.invert(other.bit_vector[:other.offset0]))
-            result.bit_vector[self.offset0:] = self.bit_vector[self.offset0:][:]
-                               
+        #editing a_val, two's complement wraps within the field mask
+        if not difference & self.bc_field_mask and self.a_len != 0:
+            a_word = ((self.word & self.a_field_mask) - (other.word & self.a_field_mask)) & self.a_field_mask
+            return ABCMethods.from_word(type(self), a_word | (self.word & self.bc_field_mask))
+
         #if a_vals and c_vals are equal (unsigned subtraction)
         #editing b_val, no two's complement
-        #like addition, but must use a different carry system
-        elif self.bit_vector[:self.offset0] == other.bit_vector[:self.offset0] and \
-             self.bit_vector[self.offset1:] == other.bit_vector[self.offset1:] and \
-             self.b_len != 0:
-            result.bit_vector[self.offset0:self.offset1] = ABCMethods.unsigned_subtract(self.bit_vector[self.offset0:self.offset1],
-                                                                                        other.bit_vector[other.offset0:other.offset1])
-            result.bit_vector[:self.offset0] = self.bit_vector[:self.offset0][:]
-            result.bit_vector[self.offset1:] = self.bit_vector[self.offset1:][:]
-
-        #implement later                    
-        else:
-            raise NotImplementedException()
-        return result
+        elif not difference & self.ac_field_mask and self.b_len != 0:
+            b_word = ((self.word & self.b_field_mask) - (other.word & self.b_field_mask)) & self.b_field_mask
+            return ABCMethods.from_word(type(self), b_word | (self.word & self.ac_field_mask))
+
+        #mixed forms may still line up once both are normalized
+        normal_word0 = type(self).normal_word(self.word)
+        normal_word1 = type(self).normal_word(other.word)
+        if normal_word0 != self.word or normal_word1 != other.word:
+            return ABCMethods.subtraction(ABCMethods.from_word(type(self), normal_word0), ABCMethods.from_word(type(self), normal_word1))
+
+        #implement later
+        raise NotImplementedException()
 
     #shifts left according to the parameters
     def shift_left(bit_vector, shift):
@@ -292,92 +548,330 @@ class ABCMethods:
 
     #implementation of * operator
     def multiplication(self, other):
-        
-        #TODO: normalize a, b values for self and other
-        if type(self) != type(other):
-            raise TypeMismatchException()
-        result = type(self)()
+
+        self, other = ABCMethods.coerce(self, other)
+        difference = self.word ^ other.word
 
         #if b_vals and c_vals are equal (signed multiplication)
-        if self.bit_vector[self.offset0:self.offset1] == other.bit_vector[self.offset0:self.offset1] and \
-           self.bit_vector[self.offset1:] == other.bit_vector[self.offset1:] and \
-           self.a_len != 0:
-            result.bit_vector[:self.offset0] = ABCMethods.signed_multiply(self.bit_vector[:self.offset0],
-                                                                          other.bit_vector[:other.offset0])
-            result.bit_vector[self.offset0:] = self.bit_vector[self.offset0:][:]
-                               
+        #the low bits of a two's complement product do not depend on the signs,
+        #so wrapping needs no sign handling
+        if not difference & self.bc_field_mask and self.a_len != 0:
+            a_bits0 = self.word >> self.a_shift
+            a_bits1 = other.word >> self.a_shift
+            if self.overflow == ABCMethods.WRAP:
+                a_bits = (a_bits0 * a_bits1) & self.a_mask
+            else:
+                a_bits = ABCMethods.fit_field(ABCMethods.to_signed(a_bits0, self.a_len) * ABCMethods.to_signed(a_bits1, self.a_len),
+                                              self.a_extrema, self.a_mask, self.overflow)
+            return ABCMethods.from_word(type(self), a_bits << self.a_shift | (self.word & self.bc_field_mask))
+
         #if a_vals and c_vals are equal (unsigned multiplication)
-        elif self.bit_vector[:self.offset0] == other.bit_vector[:self.offset0] and \
-             self.bit_vector[self.offset1:] == other.bit_vector[self.offset1:] and \
-             self.b_len != 0:
-            result.bit_vector[self.offset0:self.offset1] = ABCMethods.unsigned_multiply(self.bit_vector[self.offset0:self.offset1],
-                                                                                        other.bit_vector[other.offset0:other.offset1])
-            result.bit_vector[:self.offset0] = self.bit_vector[:self.offset0][:]
-            result.bit_vector[self.offset1:] = self.bit_vector[self.offset1:][:]
-
-        #implement later                    
-        else:
+        elif not difference & self.ac_field_mask and self.b_len != 0:
+            b_bits = ABCMethods.fit_field(((self.word >> self.b_shift) & self.b_mask) * ((other.word >> self.b_shift) & self.b_mask),
+                                          self.b_extrema, self.b_mask, self.overflow)
+            return ABCMethods.from_word(type(self), b_bits << self.b_shift | (self.word & self.ac_field_mask))
+
+        #B and C differ: multiply the values exactly, rationalizing and combining
+        #the radicals under a common root, and fit the normal form of the product
+        #an exact product cannot wrap or saturate, so one that does not fit raises
+        try:
+            product = normalize.multiply(*ABCMethods.values(self), *ABCMethods.values(other))
+        except ZeroDivisionError:
             raise NotImplementedException()
-        return result
-    
-    #the floating-point decimal value of the floating-offset number
-    def represent(self):
-        #print("a_extrema", self.a_extrema[0])
-        #computation of signed A value
-        if self.a_len == 0:
-            a_val = 1
-        else:
-            if self.bit_vector[0] == True:
-                a_val = self.a_extrema[0]
-            else:
-                a_val = 0
-            if self.a_len > 1:
-                a_val += int("".join([ABCMethods.MAPPING[bit] for bit in self.bit_vector[1:self.offset0]]), 2)
-        #print("a_val represent", a_val)
+        except OverflowError:
+            raise OverflowException()
+        return ABCMethods.from_word(type(self), ABCMethods.fit(type(self), *product))
 
-        #computation of unsigned B value (simpler)
-        b_val = 1 if self.b_len == 0 else int("".join([ABCMethods.MAPPING[bit] for bit in self.bit_vector[self.offset0:self.offset1]]), 2)
+    #implementation of the +=, -= and *= operators
+    #the result is written into self instead of a new instance whenever it has the type of
+    #self, so a value that has been used as a dict key or set member must not be updated
+    def store(self, result):
+        if type(result) is not type(self):
+            return result
+        self.word = result.word
+        return self
 
-        #computation of signed C value
-        if self.c_len == 0:
-            c_val = 1
-        else:
-            if self.bit_vector[self.offset1] == True:
-                c_val = self.c_extrema[0]
-            else:
-                c_val = 0
-            if self.c_len > 1:
-                c_val += int("".join([ABCMethods.MAPPING[bit] for bit in self.bit_vector[self.offset1 + 1:]]), 2)
+    def in_place_addition(self, other):
+        return ABCMethods.store(self, ABCMethods.addition(self, other))
+
+    def in_place_subtraction(self, other):
+        return ABCMethods.store(self, ABCMethods.subtraction(self, other))
+
+    def in_place_multiplication(self, other):
+        return ABCMethods.store(self, ABCMethods.multiplication(self, other))
+
+    #the normal form of the exact quotient of the values of self and other, raising
+    #ZeroDivisionError when other is 0 and NotImplementedException when either value is
+    #undefined (C of 0)
+    #1/(A*B^(1/C)) is sign(A)*|A|^(1/-1)*B^(1/-C), so the quotient is two exact products
+    def exact_quotient(self, other):
+        a_val0, b_val0, c_val0 = ABCMethods.values(self)
+        a_val1, b_val1, c_val1 = ABCMethods.values(other)
+        try:
+            normalize.sign(a_val0, b_val0, c_val0)
+            divisor_sign = normalize.sign(a_val1, b_val1, c_val1)
+        except ZeroDivisionError:
+            raise NotImplementedException()
+        if divisor_sign == 0:
+            raise ZeroDivisionError("division by zero")
+        try:
+            quotient = normalize.multiply(a_val0, b_val0, c_val0, divisor_sign, b_val1, -c_val1)
+            return normalize.multiply(*quotient, 1, abs(a_val1), -1)
+        except OverflowError:
+            raise OverflowException()
+
+    #the largest integer not above the value given by the normal triple (A, B, C)
+    #an irrational value is never an integer, so below 0 it is one less than it truncates to
+    def floor_value(a_val, b_val, c_val):
+        if c_val == 1:
+            return a_val
+        if c_val == -1:
+            return a_val//b_val
+        n = abs(c_val)
+        power = abs(a_val)**n
+        root = normalize.iroot(power*b_val if c_val > 0 else power//b_val, n)
+        return root if a_val > 0 else -root - 1
+
+    #floor quotient and remainder shared by // and %: returns the word of the quotient, or
+    #of the remainder x - y*(x//y) when remainder is true
+    #values that share B and C, or A and a C of 1, divide one field with Python int divmod,
+    #since the factor they share cancels, and anything else is divided exactly
+    def floor_divide(self, other, remainder):
+        self, other = ABCMethods.coerce(self, other)
+        cls = type(self)
+        difference = self.word ^ other.word
+        a_val0, b_val0, c_val0 = ABCMethods.values(self)
+
+        #if b_vals and c_vals are equal and B^(1/C) is a nonzero number (signed division)
+        #floors like Python ints, so the remainder takes the sign of the divisor
+        if not difference & cls.bc_field_mask and cls.a_len != 0 and c_val0 != 0 and b_val0 != 0:
+            quotient, rest = divmod(a_val0, ABCMethods.to_signed(other.word >> cls.a_shift, cls.a_len))
+            untouched = self.word & cls.bc_field_mask
+            if remainder:
+                return (rest & cls.a_mask) << cls.a_shift | untouched
+            if b_val0 != 1:
+                return ABCMethods.fit(cls, quotient, 1, 1)
+
+            #the untouched fields stand for 1, and only the most negative value divided by
+            #-1 can leave the field
+            return ABCMethods.fit_field(quotient, cls.a_extrema, cls.a_mask, cls.overflow) << cls.a_shift | untouched
+
+        #if a_vals and c_vals are equal, A is nonzero and C is 1 (unsigned division)
+        elif not difference & cls.ac_field_mask and cls.b_len != 0 and c_val0 == 1 and a_val0 != 0:
+            quotient, rest = divmod(b_val0, (other.word >> cls.b_shift) & cls.b_mask)
+            untouched = self.word & cls.ac_field_mask
+            if remainder:
+                return rest << cls.b_shift | untouched
+            if a_val0 != 1:
+                return ABCMethods.fit(cls, quotient, 1, 1)
+            return quotient << cls.b_shift | untouched
+
+        #otherwise floor the exact quotient, and build the remainder y*(x/y - x//y), which
+        #is a single term only when the quotient is rational
+        quotient = ABCMethods.exact_quotient(self, other)
+        floor = ABCMethods.floor_value(*quotient)
+        if not remainder:
+            return ABCMethods.fit(cls, floor, 1, 1)
+        if abs(quotient[2]) != 1:
+            raise NotImplementedException()
+
+        #a normal quotient with C of 1 has B of 1, so A/B is the quotient either way
+        numerator, denominator = quotient[0], quotient[1]
+        try:
+            rest = normalize.multiply(*ABCMethods.values(other), numerator - floor*denominator, denominator, -1)
+        except OverflowError:
+            raise OverflowException()
+        return ABCMethods.fit(cls, *rest)
+
+    #implementation of // operator
+    def floor_division(self, other):
+        return ABCMethods.from_word(type(self), ABCMethods.floor_divide(self, other, False))
+
+    #implementation of % operator
+    def modulo(self, other):
+        return ABCMethods.from_word(type(self), ABCMethods.floor_divide(self, other, True))
+
+    #implementation of / operator
+    #the quotient is exact, and one the layout cannot hold raises OverflowException
+    def true_division(self, other):
+        self, other = ABCMethods.coerce(self, other)
+        a_val0, b_val0, c_val0 = ABCMethods.values(self)
+        a_val1, b_val1, c_val1 = ABCMethods.values(other)
+
+        #if both numbers are integers or rationals (C equal to 1 or -1), divide them as
+        #fractions: swap the divisor into numerator and denominator and reduce by the gcd
+        if c_val0 in (1, -1) and c_val1 in (1, -1):
+            numerator0, denominator0 = (a_val0*b_val0, 1) if c_val0 == 1 else (a_val0, b_val0)
+            numerator1, denominator1 = (a_val1*b_val1, 1) if c_val1 == 1 else (a_val1, b_val1)
+            if denominator0 == 0 or denominator1 == 0:
+                raise NotImplementedException()
+            numerator = numerator0*denominator1
+            denominator = denominator0*numerator1
+            if denominator == 0:
+                raise ZeroDivisionError("division by zero")
+            if denominator < 0:
+                numerator, denominator = -numerator, -denominator
+            divisor = math.gcd(numerator, denominator)
+            numerator, denominator = numerator//divisor, denominator//divisor
+            return ABCMethods.from_word(type(self), ABCMethods.fit(type(self), numerator, denominator, -1 if denominator != 1 else 1))
+
+        #otherwise multiply by the reciprocal exactly
+        return ABCMethods.from_word(type(self), ABCMethods.fit(type(self), *ABCMethods.exact_quotient(self, other)))
 
-        return str(a_val*b_val**(1/c_val))
+    #implementation of float()
+    #rationals (C of 1 or -1) are rounded only once, and a B too large for a float
+    #is taken to its root through its logarithm
+    def to_float(self):
+        a_val, b_val, c_val = ABCMethods.values(self)
+        if c_val == 0:
+            raise ZeroDivisionError("C is 0")
+        if c_val == 1:
+            return float(a_val*b_val)
+        if c_val == -1:
+            return a_val/b_val
+        if b_val.bit_length() < 1000:
+            return a_val*b_val**(1/c_val)
+        return a_val*math.exp(math.log(b_val)/c_val)
+
+    #implementation of int(), truncating toward zero like int() of a float but without rounding
+    def to_int(self):
+        a_val, b_val, c_val = normalize.normalize(*ABCMethods.values(self))
+        if c_val == 1:
+            return a_val
+        power = abs(a_val)**abs(c_val)
+        root = normalize.iroot(power*b_val if c_val > 0 else power//b_val, abs(c_val))
+        return root if a_val > 0 else -root
+
+    #the exact value as a Fraction, raising ValueError when it is irrational
+    def as_fraction(self):
+        import fractions
+        a_val, b_val, c_val = normalize.normalize(*ABCMethods.values(self))
+        if c_val == 1:
+            return fractions.Fraction(a_val)
+        if c_val == -1:
+            return fractions.Fraction(a_val, b_val)
+        raise ValueError("value is irrational")
+
+    #the value as a Decimal with precision digits after the point, rounded half away from zero
+    #the digits come from an integer nth root of the scaled value, so they are all exact
+    def to_decimal(self, precision):
+        import decimal
+        if precision < 0:
+            raise ValueError("precision is negative")
+        a_val, b_val, c_val = normalize.normalize(*ABCMethods.values(self))
+        n = abs(c_val)
+        power = abs(a_val)**n*10**((precision + 1)*n)
+        digits = (normalize.iroot(power*b_val if c_val > 0 else power//b_val, n) + 5)//10
+        return decimal.Decimal((int(a_val < 0 and digits > 0), tuple(int(digit) for digit in str(digits)), -precision))
+
+    #creates the instance of cls nearest to x, a float, int, Fraction or Decimal, or the
+    #one just below or above it for a mode of "floor" or "ceil", as quantize.quantize_word
+    def from_float(cls, x, mode):
+        import quantize
+        return ABCMethods.from_word(cls, quantize.quantize_word(cls, x, mode))
+
+    #the floating-point decimal value of the floating-offset number
+    #values of wide layouts beyond the range of a float print as inf or -inf
+    def represent(self):
+        try:
+            return str(ABCMethods.to_float(self))
+        except OverflowError:
+            return str(math.copysign(math.inf, ABCMethods.a_value(self)))
 
 """
 This is a class factory whose instances are types for floating-offset numbers. All work
 is done in the new constructor, which initializes fields and methods for the class to
 give to its instances. Method definitions are given in the ABC_Methods namespace.
+The masks and shifts used to pull the A, B and C fields out of the packed word are
+computed once here, so the methods never have to walk the word bit by bit. Instances
+are slotted and hold nothing but the word, and the resulting per-instance size is
+published on the type as instance_footprint. Each type also gets its own bounded cache
+of normal forms, normal_word, so equality and mixed-form arithmetic do not factor the
+same value twice.
+
+The hottest methods (+, -, *, +=, -=, *=, the comparisons, hash() and the a, b and c
+properties) are then replaced by kernels that kernels.build generates for this layout,
+with its masks and shifts written in as constants and the cases for missing fields
+left out. They hand anything they do not cover to the ABCMethods functions, and their
+source is kept on the type as kernel_source. The in-place operators write into the
+word of the left operand rather than allocating a new instance, so a value used as a
+dict key or set member should not be updated with them.
+
+The overflow argument selects what multiplication does with a product that does not
+fit its field: "wrap" keeps the low bits (fixed-width machine behavior), "saturate"
+clamps to the field's extrema and "raise" throws OverflowException.
+
+Types are interned: asking again for the same offsets, vector size and overflow mode
+returns the type object made the first time, under the name it was first given.
+
+tables = True gives a layout of at most 16 bits lookup tables, built on first use, for
+float(), str(), the comparisons and normalize(), and for layouts of at most 8 bits for
+the arithmetic operators too (see lookup_tables). The tables go on the interned type,
+so every holder of the layout gets them.
 """
-def ABC(name, offset0, offset1, vector_size = 64):
+def ABC(name, offset0, offset1, vector_size = 64, overflow = ABCMethods.WRAP, tables = False):
+        key = (offset0, offset1, vector_size, overflow)
+        if key in EqualityMeta.interned:
+            cls = EqualityMeta.interned[key]
+            if tables:
+                import lookup_tables
+                lookup_tables.install(cls)
+            return cls
         if not 0 <= offset0 <= offset1 <= vector_size:
             raise BadOffsetsException()
-        return EqualityMeta(name, (),  {
+        if overflow not in ABCMethods.OVERFLOW_MODES:
+            raise ValueError("overflow must be one of " + ", ".join(ABCMethods.OVERFLOW_MODES))
+        a_len = offset0
+        b_len = offset1 - offset0
+        c_len = vector_size - offset1
+        vector_mask = 2**vector_size - 1
+        a_field_mask = vector_mask ^ (2**(b_len + c_len) - 1)
+        b_field_mask = (2**b_len - 1) << c_len
+        c_field_mask = 2**c_len - 1
+        cls = EqualityMeta(name, (),  {
+
+                                        #instances carry only the packed word
+                                        "__slots__": ("word",),
 
                                         #fields
                                         "offset0": offset0,
                                         "offset1": offset1,
                                         "offsets_string": str(offset0) + ':' + str(offset1) + ':' + str(vector_size),
-                                        "a_len": offset0,
-                                        "b_len": offset1 - offset0,
-                                        "c_len": vector_size - offset1,
-                                        "a_extrema": ABCMethods.signed_extremes(offset0),
-                                        "b_extrema": ABCMethods.unsigned_extremes(offset1 - offset0),
-                                        "c_extrema": ABCMethods.signed_extremes(vector_size - offset1),
+                                        "a_len": a_len,
+                                        "b_len": b_len,
+                                        "c_len": c_len,
+                                        "a_extrema": ABCMethods.signed_extremes(a_len),
+                                        "b_extrema": ABCMethods.unsigned_extremes(b_len),
+                                        "c_extrema": ABCMethods.signed_extremes(c_len),
                                         "vector_size": vector_size,
+                                        "byte_size": (vector_size + 7)//8,
                                         "a_val_max_binary": 2**offset0 - 1,
-                                        
+                                        "overflow": overflow,
+
+                                        #packed word layout
+                                        "a_shift": b_len + c_len,
+                                        "b_shift": c_len,
+                                        "a_mask": 2**a_len - 1,
+                                        "b_mask": 2**b_len - 1,
+                                        "c_mask": 2**c_len - 1,
+                                        "vector_mask": vector_mask,
+                                        "a_field_mask": a_field_mask,
+                                        "b_field_mask": b_field_mask,
+                                        "c_field_mask": c_field_mask,
+                                        "bc_field_mask": b_field_mask | c_field_mask,
+                                        "ac_field_mask": a_field_mask | c_field_mask,
+
                                         #methods
                                         #constructor
                                         "__init__": lambda self, a_val = 1, b_val = 1, c_val = 1: ABCMethods.construct(self, a_val, b_val, c_val),
 
+                                        #list-of-bools view of the packed word
+                                        "bit_vector": property(lambda self: ABCMethods.bits(self)),
+
+                                        #big-endian bytes of the packed word
+                                        "to_bytes": lambda self: ABCMethods.to_bytes(self),
+                                        "from_bytes": classmethod(lambda cls, data: ABCMethods.from_bytes(cls, data)),
+
                                         #bitwise
                                         "__or__": lambda self, other: ABCMethods.bitwise_or(self, other),
                                         "__and__": lambda self, other: ABCMethods.bitwise_and(self, other),
@@ -386,100 +880,291 @@ def ABC(name, offset0, offset1, vector_size = 64):
 
                                         #comparators
                                         "__eq__": lambda self, other: ABCMethods.equals(self, other),
+                                        "__lt__": lambda self, other: ABCMethods.compare(self, other) < 0,
+                                        "__le__": lambda self, other: ABCMethods.compare(self, other) <= 0,
+                                        "__gt__": lambda self, other: ABCMethods.compare(self, other) > 0,
+                                        "__ge__": lambda self, other: ABCMethods.compare(self, other) >= 0,
+                                        "__hash__": lambda self: ABCMethods.value_hash(self),
 
                                         #arithmetic
                                         "__add__": lambda self, other: ABCMethods.addition(self, other),
                                         "__sub__": lambda self, other: ABCMethods.subtraction(self, other),
                                         "__mul__": lambda self, other: ABCMethods.multiplication(self, other),
+                                        "__floordiv__": lambda self, other: ABCMethods.floor_division(self, other),
+                                        "__mod__": lambda self, other: ABCMethods.modulo(self, other),
+                                        "__truediv__": lambda self, other: ABCMethods.true_division(self, other),
+
+                                        #in-place arithmetic, updating the word of the left operand
+                                        "__iadd__": lambda self, other: ABCMethods.in_place_addition(self, other),
+                                        "__isub__": lambda self, other: ABCMethods.in_place_subtraction(self, other),
+                                        "__imul__": lambda self, other: ABCMethods.in_place_multiplication(self, other),
+
+                                        #canonical form
+                                        "normalize": lambda self: ABCMethods.canonicalize(self),
+
+                                        #field values
+                                        "a": property(lambda self: ABCMethods.a_value(self)),
+                                        "b": property(lambda self: ABCMethods.b_value(self)),
+                                        "c": property(lambda self: ABCMethods.c_value(self)),
+
+                                        #exact and approximate values
+                                        "__float__": lambda self: ABCMethods.to_float(self),
+                                        "__int__": lambda self: ABCMethods.to_int(self),
+                                        "as_fraction": lambda self: ABCMethods.as_fraction(self),
+                                        "to_decimal": lambda self, precision: ABCMethods.to_decimal(self, precision),
+                                        "from_float": classmethod(lambda cls, x, mode = "nearest": ABCMethods.from_float(cls, x, mode)),
 
                                         #convert to floating point decimal
                                         "__str__": lambda self: ABCMethods.represent(self)
                                         })
+        cls.instance_footprint = ABCMethods.footprint(cls)
+        generated, cls.kernel_source = kernels.build(cls, {"ABCMethods": ABCMethods, "OverflowException": OverflowException})
+        for kernel_name, kernel in generated.items():
+            attribute = ABCMethods.KERNEL_ATTRIBUTES[kernel_name]
+            setattr(cls, attribute, property(kernel) if kernel_name.endswith("_value") else kernel)
+        cls.normal_word = staticmethod(functools.lru_cache(maxsize = normalize.NORMALIZE_CACHE_SIZE)(
+                                       functools.partial(ABCMethods.normalized_word, cls)))
+        EqualityMeta.interned[key] = cls
+        for hook in EqualityMeta.creation_hooks:
+            hook(cls)
+        if tables:
+            import lookup_tables
+            lookup_tables.install(cls)
+        return cls
+
+#converts value to an equal value of TargetType, raising OverflowException if TargetType cannot hold it
+convert = ABCMethods.convert
+
+"""
+Commonly used layouts, each given as the arguments ABC is called with. Nothing is built
+when the module is imported: a layout becomes a type the first time it is looked up as
+an attribute of the module, as floating_offset.I64 or from floating_offset import
+Rational, and the type is kept in the module from then on.
+"""
+LAYOUTS = {
+    "I8": ("Signed 8-Bit Integer", 8, 8, 8),
+    "U8": ("Unsigned 8-Bit Integer", 0, 8, 8),
+    "I16": ("Signed 16-Bit Integer", 16, 16, 16),
+    "U16": ("Unsigned 16-Bit Integer", 0, 16, 16),
+    "I32": ("Signed 32-Bit Integer", 32, 32, 32),
+    "U32": ("Unsigned 32-Bit Integer", 0, 32, 32),
+    "I64": ("Signed 64-Bit Integer", 64, 64),
+    "U64": ("Unsigned 64-Bit Integer", 0, 64),
+    "I128": ("Signed 128-Bit Integer", 128, 128, 128),
+    "U128": ("Unsigned 128-Bit Integer", 0, 128, 128),
+    "Rational": ("Rational", 32, 62),
+    "Radical": ("Radical", 16, 48),
+}
+
+#builds the layouts of LAYOUTS on first access
+def __getattr__(name):
+    if name not in LAYOUTS:
+        raise AttributeError("module " + repr(__name__) + " has no attribute " + repr(name))
+    cls = ABC(*LAYOUTS[name])
+    globals()[name] = cls
+    return cls
+
+def __dir__():
+    return sorted(set(globals()) | set(LAYOUTS))
 
 #TESTS
-    
-#floating-offset classes
-print("floating offset classes being constructed")
-I64 = ABC("Signed 64-Bit Integer", 64, 64)
-U64 = ABC("Unsigned 64-Bit Integer", 0, 64)
-print()
-
-#floating-offset numbers
-print("floating-offset numbers being constructed")
-i0 = I64(56)
-i1 = I64(25)
-u0 = U64(b_val = 10)
-u1 = U64(b_val = 20)
-
-#bitwise operations
-print("bitwise operations")
-i2 = ~i0
-i3 = i0&i1
-i4 = i0|i1
-i5 = i0^i1
-u2 = ~u0
-u3 = u0&u1
-u4 = u0|u1
-u5 = u0^u1
-print()
-
-print("printing values")
-print("i0", i0)
-print("i1", i1)
-print("i2", i2)
-print("i3", i3)
-print("i4", i4)
-print("i5", i5)
-
-print("u0", u0)
-print("u1", u1)
-print("u2", u2)
-print("u3", u3)
-print("u4", u4)
-print("u5", u5)
-print()
-
-#equality checks
-ie0 = I64(56)
-ie1 = I64(56)
-ie2 = I64(-26)
-ie3 = I64(-26)
-ie4 = I64(1)
-ie5 = I64(-2)
-ie6 = I64(26)
-ue0 = U64(b_val = 56)
-ue1 = U64(b_val = 56)
-ue2 = U64(b_val = 26)
-
-print("signed 56 == signed 56?", ie0 == ie1)
-print("signed 56 == signed -26?", ie0 == ie2)
-print("signed -26 == signed -26?", ie2 == ie3)
-print("unsigned 56 == unsigned 56?", ue0 == ue1)
-print("unsigned 56 == unsigned 26?", ue0 == ue2)
-
-#arithmetic checks
-#addition
-print("addition")
-print("signed 56 + signed 56 == signed 112?", ie0 + ie1)
-print("signed 56 + signed -26 == signed 30?", ie0 + ie2)
-print("signed 1 + signed -2 == signed -1?", ie4 + ie5)
-print("signed 56 + signed -26 + signed -26 + signed -26 == signed -22?", ie0 + ie2 + ie3 + ie2)
-print("unsigned 56 + unsigned 56 == unsigned 112?", ue0 + ue1)
-print("unsigned 56 + unsigned 26 == unsigned 82?", ue1 + ue2)
-#subtraction
-print("subtraction")
-print("signed 1 - signed 1 == signed 0?", ie4 - ie4)
-print("signed 56 - signed 56 == signed 0?", ie0 - ie1)
-print("signed 56 - signed 26 == signed 30?", ie1 - ie6)
-print("signed 56 - signed 26 - signed 26 - signed 26 == signed -22?", ie0 - ie6 - ie6 - ie6)
-print("signed 56 - signed -26 == signed 82?", ie0 - ie2)
-print("signed -26 - signed -26 == signed 0?", ie2 - ie2)
-print("unsigned 56 - unsigned 26 == unsigned 30?", ue0 - ue2)
-print("unsigned 56 - unsigned 56 == unsigned 0?", ue0 - ue0)
-#multiplication
-print("multiplication")
-print("signed 56 * signed 56 == signed 3136?", ie0*ie1)
-print("signed 56 * signed -26 == signed -1456?", ie0*ie2)
-print("signed 56 * signed -26 * signed -26 * signed -26 == signed -984256?", ie0*ie2*ie3*ie2)
-print("unsigned 56 * unsigned 56 == unsigned 3136?", ue0*ue1)
-print("unsigned 56 * unsigned 26 == unsigned 1456?", ue1*ue2)
+if __name__ == "__main__":
+    #floating-offset classes
+    print("floating offset classes being constructed")
+    I64 = ABC("Signed 64-Bit Integer", 64, 64)
+    U64 = ABC("Unsigned 64-Bit Integer", 0, 64)
+    print("bytes per I64 instance", I64.instance_footprint)
+    print("same layout, same type?", ABC("Long", 64, 64) is I64)
+    print()
+
+    #floating-offset numbers
+    print("floating-offset numbers being constructed")
+    i0 = I64(56)
+    i1 = I64(25)
+    u0 = U64(b_val = 10)
+    u1 = U64(b_val = 20)
+
+    #bitwise operations
+    print("bitwise operations")
+    i2 = ~i0
+    i3 = i0&i1
+    i4 = i0|i1
+    i5 = i0^i1
+    u2 = ~u0
+    u3 = u0&u1
+    u4 = u0|u1
+    u5 = u0^u1
+    print()
+
+    print("printing values")
+    print("i0", i0)
+    print("i1", i1)
+    print("i2", i2)
+    print("i3", i3)
+    print("i4", i4)
+    print("i5", i5)
+
+    print("u0", u0)
+    print("u1", u1)
+    print("u2", u2)
+    print("u3", u3)
+    print("u4", u4)
+    print("u5", u5)
+    print()
+
+    #equality checks
+    ie0 = I64(56)
+    ie1 = I64(56)
+    ie2 = I64(-26)
+    ie3 = I64(-26)
+    ie4 = I64(1)
+    ie5 = I64(-2)
+    ie6 = I64(26)
+    ue0 = U64(b_val = 56)
+    ue1 = U64(b_val = 56)
+    ue2 = U64(b_val = 26)
+
+    print("signed 56 == signed 56?", ie0 == ie1)
+    print("signed 56 == signed -26?", ie0 == ie2)
+    print("signed -26 == signed -26?", ie2 == ie3)
+    print("unsigned 56 == unsigned 56?", ue0 == ue1)
+    print("unsigned 56 == unsigned 26?", ue0 == ue2)
+    Radical = ABC("Radical", 16, 48)
+    print("2*8^(1/2) == 4*2^(1/2)?", Radical(2, 8, 2) == Radical(4, 2, 2))
+    print("2*8^(1/2) + 2^(1/2) == 5*2^(1/2)?", Radical(2, 8, 2) + Radical(1, 2, 2))
+    print("2^(1/2) < 3^(1/3)?", Radical(1, 2, 2) < Radical(1, 3, 3))
+    print("-2*2^(1/-2) <= -2^(1/2)?", Radical(-2, 2, -2) <= Radical(-1, 2, 2))
+    print("distinct values among 2*8^(1/2), 4*2^(1/2), 2^(1/2)?", len({Radical(2, 8, 2), Radical(4, 2, 2), Radical(1, 2, 2)}))
+    print("signed 5 and radical 5 in one set?", len({I64(5), Radical(5)}))
+    print("sorted:", [str(x) for x in sorted([Radical(1, 3, 3), Radical(-1, 2, 2), Radical(1, 2, 2), Radical(3, 4, -1)])])
+    #value extraction
+    print("fields of 2*8^(1/2):", Radical(2, 8, 2).a, Radical(2, 8, 2).b, Radical(2, 8, 2).c)
+    print("int(-3*5^(1/2)) == -6?", int(Radical(-3, 5, 2)))
+    print("6/8 as a fraction?", Radical(6, 8, -1).as_fraction())
+    print("2^(1/2) to 30 places:", Radical(1, 2, 2).to_decimal(30))
+    #other widths
+    I8 = ABC("Signed 8-Bit Integer", 8, 8, 8)
+    I16 = ABC("Signed 16-Bit Integer", 16, 16, 16)
+    I128 = ABC("Signed 128-Bit Integer", 128, 128, 128)
+    Radical256 = ABC("256-Bit Radical", 64, 192, 256)
+    print("signed 8-bit 100 + signed 8-bit 100 == signed 8-bit -56?", I8(100) + I8(100))
+    print("signed 16-bit 300 * signed 16-bit 200 == signed 16-bit -5536?", I16(300)*I16(200))
+    print("signed 128-bit 2^100 + 2^100 == 2^101?", int(I128(2**100) + I128(2**100)) == 2**101)
+    print("256-bit 3*(2^127 - 1)^(1/2) + 4*(2^127 - 1)^(1/2) == 7*(2^127 - 1)^(1/2)?",
+          Radical256(3, 2**127 - 1, 2) + Radical256(4, 2**127 - 1, 2) == Radical256(7, 2**127 - 1, 2))
+    print("bytes per 256-bit radical instance", Radical256.instance_footprint)
+    #serialization
+    print("signed -26 as bytes:", ie2.to_bytes().hex())
+    print("round trip through bytes?", I64.from_bytes(ie2.to_bytes()) == ie2)
+
+    #arithmetic checks
+    #addition
+    print("addition")
+    print("signed 56 + signed 56 == signed 112?", ie0 + ie1)
+    print("signed 56 + signed -26 == signed 30?", ie0 + ie2)
+    print("signed 1 + signed -2 == signed -1?", ie4 + ie5)
+    print("signed 56 + signed -26 + signed -26 + signed -26 == signed -22?", ie0 + ie2 + ie3 + ie2)
+    print("unsigned 56 + unsigned 56 == unsigned 112?", ue0 + ue1)
+    print("unsigned 56 + unsigned 26 == unsigned 82?", ue1 + ue2)
+    #subtraction
+    print("subtraction")
+    print("signed 1 - signed 1 == signed 0?", ie4 - ie4)
+    print("signed 56 - signed 56 == signed 0?", ie0 - ie1)
+    print("signed 56 - signed 26 == signed 30?", ie1 - ie6)
+    print("signed 56 - signed 26 - signed 26 - signed 26 == signed -22?", ie0 - ie6 - ie6 - ie6)
+    print("signed 56 - signed -26 == signed 82?", ie0 - ie2)
+    print("signed -26 - signed -26 == signed 0?", ie2 - ie2)
+    print("unsigned 56 - unsigned 26 == unsigned 30?", ue0 - ue2)
+    print("unsigned 56 - unsigned 56 == unsigned 0?", ue0 - ue0)
+    #multiplication
+    print("multiplication")
+    print("signed 56 * signed 56 == signed 3136?", ie0*ie1)
+    print("signed 56 * signed -26 == signed -1456?", ie0*ie2)
+    print("signed 56 * signed -26 * signed -26 * signed -26 == signed -984256?", ie0*ie2*ie3*ie2)
+    print("unsigned 56 * unsigned 56 == unsigned 3136?", ue0*ue1)
+    print("unsigned 56 * unsigned 26 == unsigned 1456?", ue1*ue2)
+    total = I64(0)
+    for k in range(1, 101):
+        total += I64(k)
+    print("signed 1 + ... + signed 100 == signed 5050, in place?", total)
+    print("5^(1/3) * 2^(1/-2) == 5*5000^(1/-6)?", Radical(1, 5, 3)*Radical(1, 2, -2))
+    #conversion
+    print("conversion")
+    I32 = ABC("Signed 32-Bit Integer", 32, 32, 32)
+    print("signed 32-bit -26 as signed 64-bit?", convert(I32(-26), I64))
+    print("unsigned 56 as signed 64-bit?", convert(ue0, I64))
+    I32.promote(I64)
+    print("signed 32-bit -26 + signed 64-bit 56 == signed 64-bit 30?", I32(-26) + ie0)
+    #overflow modes
+    I8W = ABC("Wrapping Signed 8-Bit Integer", 8, 8, 8)
+    I8S = ABC("Saturating Signed 8-Bit Integer", 8, 8, 8, "saturate")
+    I8R = ABC("Checked Signed 8-Bit Integer", 8, 8, 8, "raise")
+    print("wrapping signed 100 * signed 3 == signed 44?", I8W(100)*I8W(3))
+    print("saturating signed 100 * signed -3 == signed -128?", I8S(100)*I8S(-3))
+    try:
+        I8R(100)*I8R(3)
+    except OverflowException:
+        print("checked signed 100 * signed 3 raises OverflowException")
+    #division
+    print("division")
+    print("signed 56 // signed -26 == signed -3?", ie0//ie2)
+    print("signed 56 % signed -26 == signed -22?", ie0%ie2)
+    print("unsigned 56 // unsigned 26 == unsigned 2?", ue0//ue2)
+    print("unsigned 56 % unsigned 26 == unsigned 4?", ue0%ue2)
+    print("signed 56 / signed 56 == signed 1?", ie0/ie1)
+    Rational = ABC("Rational", 32, 62)
+    print("rational 3/4 / rational -5/6 == rational -9/10?", Rational(3, 4, -1)/Rational(-5, 6, -1))
+    print("6*2^(1/2) / 3*2^(1/2) == 2?", Radical(6, 2, 2)/Radical(3, 2, 2))
+    print("rational 3/4 // rational 3/2 == 0, remainder 3/4?", Rational(3, 4, -1)//Rational(3, 2, -1), Rational(3, 4, -1)%Rational(3, 2, -1))
+    #lookup tables
+    print("lookup tables")
+    Telemetry = ABC("8-Bit Radical", 3, 6, 8, tables = True)
+    print("8-bit 2*3^(1/-1) * 3*2^(1/-1) == 1 through the tables?", Telemetry(2, 3, -1)*Telemetry(3, 2, -1))
+    print("8-bit 4^(1/-2) == 2^(1/-1) through the tables?", Telemetry(1, 4, -2) == Telemetry(1, 2, -1))
+    #quantization
+    print("quantization")
+    print("nearest rational to pi:", Rational.from_float(math.pi).as_fraction())
+    print("signed 8-bit floor and ceil of -2.5:", I8.from_float(-2.5, "floor"), I8.from_float(-2.5, "ceil"))
+    import quantize
+    for mode in quantize.MODES:
+        for infinity in (math.inf, -math.inf):
+            results = []
+            for quantizer in (lambda: I8.from_float(infinity, mode), lambda: ABCMethods.from_word(I8, quantize.quantize(I8, [infinity], mode)[0])):
+                #quantize raises the exceptions of the imported module, not of this script
+                try:
+                    results.append(str(quantizer()))
+                except Exception as exception:
+                    results.append(type(exception).__name__)
+            print("signed 8-bit", mode, "of", infinity, "and in bulk:", ", ".join(results))
+    #lazy evaluation
+    print("lazy evaluation")
+    import lazy
+    print("signed 2 + 3 * 4 evaluated lazily == signed 20?", ((lazy.lazy(I64(2)) + I64(3))*I64(4)).evaluate())
+    seven = I64(7)
+    print("lazy signed 7 evaluates to a new signed 7?", lazy.lazy(seven).evaluate() is not seven)
+    #reductions
+    print("reductions")
+    import reductions
+    print("sum of signed 1 ... signed 100 == signed 5050?", reductions.fo_sum(I64(k) for k in range(1, 101)))
+    print("product of signed 1 ... signed 10 == signed 3628800?", reductions.fo_prod(I64(k) for k in range(1, 11)))
+    print("signed (1, 2, 3) . signed (4, 5, 6) == signed 32?", reductions.fo_dot(map(I64, (1, 2, 3)), map(I64, (4, 5, 6))))
+    single = I64(7)
+    print("sum of one signed 7 is a new signed 7?", reductions.fo_sum([single]) is not single, reductions.fo_sum([], single) is not single)
+    #backends
+    print("backends")
+    import backends
+    with backends.using("reference", I64):
+        print("signed 56 * signed -26 == signed -1456 on the reference backend?", I64(56)*I64(-26))
+    print("reference and native backends agree?", not any(row["mismatches"] for row in backends.differential(count = 20)))
+    #profiling
+    print("profiling")
+    import profiling
+    profiling.enable()
+    #profiling instruments the types of the imported module, not of this script
+    profiling.instrument(I64)
+    I64(1) + I64(2)
+    with profiling.profile() as block:
+        I64(1) + I64(2)
+    print("profile() in an enabled session counts 1 of 2 additions and leaves it on?", block[I64]["addition"]["calls"],
+          profiling.stats()[I64]["addition"]["calls"], profiling.enabled())
+    profiling.disable()
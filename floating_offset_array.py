@@ -0,0 +1,219 @@
+"""
+Columnar storage for many floating-offset numbers of one ABC type. A
+FloatingOffsetArray keeps the packed words of its values in a single
+NumPy uint64 column, the same layout a single instance keeps in its
+word, and applies every operator to the whole column at once. The
+A/B/C dispatch rules are the ones ABCMethods uses for single values,
+evaluated elementwise: an addition, subtraction or multiplication edits
+the A field where B and C agree and the B field where A and C agree.
+The few elements that match neither are passed to the single-value
+method, so they are normalized or raise exactly as they would alone.
+
+NumPy is only needed by this module. Layouts wider than 64 bits do not
+fit in a uint64 column and are rejected.
+"""
+
+import numpy as np
+
+import offset_file
+import quantize
+from floating_offset import ABCMethods, NotImplementedException, OverflowException, TypeMismatchException
+
+"""
+An array of floating-offset numbers bound to one type created by ABC. The words
+attribute is the uint64 column holding the packed values.
+"""
+class FloatingOffsetArray:
+
+    def __init__(self, abc_type, words):
+        if abc_type.vector_size > 64:
+            raise NotImplementedException()
+        self.abc_type = abc_type
+        self.words = np.asarray(words, dtype=np.uint64)
+
+    #builds an array from A, B and C columns, checking every value against the type's extrema
+    def from_fields(abc_type, a_vals, b_vals, c_vals):
+        columns = []
+        for values, dtype, extrema, mask, shift in ((a_vals, np.int64, abc_type.a_extrema, abc_type.a_mask, abc_type.a_shift),
+                                                    (b_vals, np.uint64, abc_type.b_extrema, abc_type.b_mask, abc_type.b_shift),
+                                                    (c_vals, np.int64, abc_type.c_extrema, abc_type.c_mask, 0)):
+            try:
+                values = np.asarray(values, dtype=dtype)
+            except OverflowError:
+                raise OverflowException()
+            if values.size and (values.min() < extrema[0] or values.max() > extrema[1]):
+                raise OverflowException()
+            columns.append((values.astype(np.uint64) & np.uint64(mask)) << np.uint64(shift))
+        return FloatingOffsetArray(abc_type, columns[0] | columns[1] | columns[2])
+
+    #builds an array of the values of abc_type nearest to the floats in values, or of those
+    #just below or above them for a mode of "floor" or "ceil", as quantize.quantize does
+    def from_floats(abc_type, values, mode = "nearest"):
+        if abc_type.vector_size <= quantize.TABLE_BITS:
+            return FloatingOffsetArray(abc_type, quantize.quantize_table(abc_type, values, mode))
+        return FloatingOffsetArray(abc_type, quantize.quantize(abc_type, values, mode))
+
+    #builds an array from an iterable of instances of abc_type
+    def from_values(abc_type, values):
+        words = []
+        for value in values:
+            if type(value) != abc_type:
+                raise TypeMismatchException()
+            words.append(value.word)
+        return FloatingOffsetArray(abc_type, np.array(words, dtype=np.uint64))
+
+    def __len__(self):
+        return len(self.words)
+
+    #single indices give an instance of the bound type, slices and masks give a new array
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return ABCMethods.from_word(self.abc_type, int(self.words[index]))
+        return FloatingOffsetArray(self.abc_type, self.words[index])
+
+    def __iter__(self):
+        for word in self.words:
+            yield ABCMethods.from_word(self.abc_type, int(word))
+
+    #the word column of other, which may be an array or a single instance of the same type
+    def operand(self, other):
+        if isinstance(other, FloatingOffsetArray):
+            if other.abc_type != self.abc_type:
+                raise TypeMismatchException()
+            return other.words
+        if type(other) != self.abc_type:
+            raise TypeMismatchException()
+        return np.uint64(other.word)
+
+    #the signed values of the field of length length sitting shift bits from the bottom of each word
+    def signed_field(self, shift, length):
+        if length == 0:
+            return np.ones(len(self.words), dtype=np.int64)
+        top = np.uint64(64 - shift - length)
+        return (self.words << top).view(np.int64) >> np.int64(64 - length)
+
+    #the A, B and C values of every element, as int64 columns for A and C and a uint64 column for B
+    def values(self):
+        abc_type = self.abc_type
+        if abc_type.b_len == 0:
+            b_vals = np.ones(len(self.words), dtype=np.uint64)
+        else:
+            b_vals = (self.words >> np.uint64(abc_type.b_shift)) & np.uint64(abc_type.b_mask)
+        return (self.signed_field(abc_type.a_shift, abc_type.a_len),
+                b_vals,
+                self.signed_field(0, abc_type.c_len))
+
+    #elementwise case selection shared by +, - and *
+    #returns the masks of elements that edit the A field and the B field
+    def dispatch(self, other_words):
+        abc_type = self.abc_type
+        difference = self.words ^ other_words
+        edit_a = (difference & np.uint64(abc_type.bc_field_mask)) == 0
+        if abc_type.a_len == 0:
+            edit_a[:] = False
+        edit_b = ~edit_a & ((difference & np.uint64(abc_type.ac_field_mask)) == 0)
+        if abc_type.b_len == 0:
+            edit_b[:] = False
+        return edit_a, edit_b
+
+    #multiplies field bits exactly as Python ints, then applies the type's saturate or raise overflow mode
+    def checked_product(self, field0, field1, extrema, length):
+        values = []
+        for field in (field0.astype(object), field1.astype(object)):
+            if extrema[0] < 0:
+                field = np.where(field >> (length - 1), field - (1 << length), field)
+            values.append(field)
+        product = values[0] * values[1]
+        if np.any((product < extrema[0]) | (product > extrema[1])):
+            if self.abc_type.overflow == ABCMethods.RAISE:
+                raise OverflowException()
+            product = np.minimum(np.maximum(product, extrema[0]), extrema[1])
+        return (product & ((1 << length) - 1)).astype(np.uint64)
+
+    #applies field_op to the A field where edit_a holds and to the B field where edit_b holds
+    #exact products go through checked_product unless the type wraps on overflow
+    #elements matching neither case are handed one at a time to the single-value method
+    #fallback, which normalizes them or raises exactly like a single value would
+    def field_operation(self, other, field_op, fallback, exact = False):
+        abc_type = self.abc_type
+        other_words = np.broadcast_to(self.operand(other), self.words.shape)
+        edit_a, edit_b = self.dispatch(other_words)
+        result = self.words.copy()
+        for index in np.flatnonzero(~(edit_a | edit_b)):
+            result[index] = fallback(self[index], ABCMethods.from_word(abc_type, int(other_words[index]))).word
+        for edit, mask, shift, untouched, extrema, length in ((edit_a, abc_type.a_mask, abc_type.a_shift, abc_type.bc_field_mask, abc_type.a_extrema, abc_type.a_len),
+                                                              (edit_b, abc_type.b_mask, abc_type.b_shift, abc_type.ac_field_mask, abc_type.b_extrema, abc_type.b_len)):
+            if not edit.any():
+                continue
+            field0 = (self.words[edit] >> np.uint64(shift)) & np.uint64(mask)
+            field1 = (other_words[edit] >> np.uint64(shift)) & np.uint64(mask)
+            if exact and abc_type.overflow != ABCMethods.WRAP:
+                field = self.checked_product(field0, field1, extrema, length)
+            else:
+                field = field_op(field0, field1) & np.uint64(mask)
+            result[edit] = (field << np.uint64(shift)) | (self.words[edit] & np.uint64(untouched))
+        return FloatingOffsetArray(abc_type, result)
+
+    #bitwise
+    def __or__(self, other):
+        return FloatingOffsetArray(self.abc_type, self.words | self.operand(other))
+
+    def __and__(self, other):
+        return FloatingOffsetArray(self.abc_type, self.words & self.operand(other))
+
+    def __xor__(self, other):
+        return FloatingOffsetArray(self.abc_type, self.words ^ self.operand(other))
+
+    def __invert__(self):
+        return FloatingOffsetArray(self.abc_type, ~self.words & np.uint64(self.abc_type.vector_mask))
+
+    #comparators
+    #elementwise, so the result is a boolean column rather than a single truth value
+    #different words are only equal if their normal forms match, and only elements whose
+    #float values are close enough to possibly be equal get the exact check
+    def __eq__(self, other):
+        other_words = np.broadcast_to(self.operand(other), self.words.shape)
+        result = self.words == other_words
+        other_array = FloatingOffsetArray(self.abc_type, other_words)
+        close = np.isclose(self.to_float64(), other_array.to_float64(), rtol = 1e-9, atol = 0)
+        for index in np.flatnonzero(~result & close):
+            result[index] = self[index] == other_array[index]
+        return result
+
+    def __ne__(self, other):
+        return ~self.__eq__(other)
+
+    #arithmetic
+    #uint64 arithmetic wraps, and masking the result to the field gives the same
+    #two's complement (A) or unsigned (B) wraparound as the single-value methods
+    def __add__(self, other):
+        return self.field_operation(other, np.add, ABCMethods.addition)
+
+    def __sub__(self, other):
+        return self.field_operation(other, np.subtract, ABCMethods.subtraction)
+
+    #products follow the type's overflow mode like ABCMethods.multiplication
+    def __mul__(self, other):
+        return self.field_operation(other, np.multiply, ABCMethods.multiplication, exact = True)
+
+    #convert to floating point decimal
+    #elements whose C value is 0 come out as inf or nan instead of raising
+    def to_float64(self):
+        a_vals, b_vals, c_vals = self.values()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return a_vals.astype(np.float64) * b_vals.astype(np.float64)**(1.0 / c_vals.astype(np.float64))
+
+    #writes the array to path in the format of offset_file, one big-endian record per element
+    def to_file(self, path):
+        byte_size = self.abc_type.byte_size
+        records = self.words.astype(">u8").view(np.uint8).reshape(-1, 8)[:, 8 - byte_size:]
+        with open(path, "wb") as file:
+            file.write(offset_file.header(self.abc_type))
+            file.write(records.tobytes())
+
+    def __array__(self, dtype = None):
+        result = self.to_float64()
+        return result if dtype is None else result.astype(dtype)
+
+    def __repr__(self):
+        return "FloatingOffsetArray(" + self.abc_type.__name__ + ", " + str(self.to_float64()) + ")"
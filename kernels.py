@@ -0,0 +1,170 @@
+"""
+Source generation for the per-layout kernels of floating-offset types. The generic
+methods in ABCMethods read the shifts, masks and lengths of a layout from the type on
+every call and branch on which fields exist. For a given layout all of those are
+constants, so ABC writes the hot methods out as Python source with the constants
+inlined and the branches for missing fields left out, and compiles it once.
+
+For I64 the sum kernel comes down to (word0 + word1) & mask, and the +=, -= and *=
+kernels do the same arithmetic but store the word back into the left operand. For a
+pure integer layout (one field holding the whole vector) equality, ordering and hashing
+compare the field values directly, since every value of such a layout is already in
+normal form.
+Anything a kernel does not handle, such as operands of another type or mixed forms that
+need normalizing, is handed to the generic ABCMethods function, so the results are
+always the ones the generic methods give.
+
+Compiled code is cached by its source text, so layouts that generate the same kernels
+share one code object.
+"""
+
+import functools
+
+#the code object for source, compiled once per distinct source text
+@functools.lru_cache(maxsize = None)
+def compile_source(source):
+    return compile(source, "<floating-offset kernels>", "exec")
+
+#expression for word shifted right by shift, leaving out shifts by 0
+def shifted(word, shift):
+    return "(" + word + " >> " + str(shift) + ")" if shift else word
+
+#expression for the two's complement value of the length-bit field bits, which must
+#already be masked
+def signed(bits, length):
+    sign = 1 << (length - 1)
+    return "((" + bits + ") ^ " + str(sign) + ") - " + str(sign)
+
+#expressions for the A, B and C values of the word named word
+def field_expressions(cls, word):
+    a_val = signed(shifted(word, cls.a_shift), cls.a_len) if cls.a_len else "1"
+    b_val = shifted(word, cls.b_shift) + " & " + str(cls.b_mask) if cls.b_len else "1"
+    c_val = signed(word + " & " + str(cls.c_mask), cls.c_len) if cls.c_len else "1"
+    return a_val, b_val, c_val
+
+#expression for the value of the word named word in a pure integer layout, or None when
+#the layout has a C field or both an A and a B field
+def integer_expression(cls, word):
+    if cls.c_len or (cls.a_len and cls.b_len) or not (cls.a_len or cls.b_len):
+        return None
+    return field_expressions(cls, word)[0 if cls.a_len else 1]
+
+#lines shared by every binary kernel: operands of another type go to the generic method
+#an in-place kernel writes its result into self instead of a new instance
+def binary_prologue(name, fallback, in_place):
+    return ["def " + name + "(self, other):",
+            "    if type(other) is not cls:",
+            "        return " + fallback + "(self, other)",
+            "    word0 = self.word",
+            "    word1 = other.word",
+            "    result = " + ("self" if in_place else "new(cls)")]
+
+#lines of the body of a field-wise kernel, taking each case only if the layout has the
+#field and checking that the other fields agree only if the layout has them
+#field_lines builds the lines computing the edited field from its whole-word mask, its
+#shift, mask, extrema and length and whether it is the signed A field
+def field_cases(cls, field_lines, fallback):
+    lines = []
+    for length, field_mask, shift, mask, extrema, untouched, is_a in ((cls.a_len, cls.a_field_mask, cls.a_shift, cls.a_mask, cls.a_extrema, cls.bc_field_mask, True),
+                                                                      (cls.b_len, cls.b_field_mask, cls.b_shift, cls.b_mask, cls.b_extrema, cls.ac_field_mask, False)):
+        if not length:
+            continue
+        indent = "    "
+        if untouched:
+            lines.append("    if not (word0 ^ word1) & " + str(untouched) + ":")
+            indent = "        "
+        body = field_lines(field_mask, shift, mask, extrema, length, is_a)
+        if untouched:
+            body[-1] += " | (word0 & " + str(untouched) + ")"
+        lines += [indent + line for line in body]
+        lines += [indent + "return result"]
+        if not untouched:
+            return lines
+    return lines + ["    return " + fallback + "(self, other)"]
+
+#source of the + or - kernel, op being the operator
+def sum_source(cls, name, op, fallback, in_place = False):
+    def field_lines(field_mask, shift, mask, extrema, length, is_a):
+        if field_mask == cls.vector_mask:
+            return ["result.word = (word0 " + op + " word1) & " + str(field_mask)]
+        return ["result.word = ((word0 & " + str(field_mask) + ") " + op + " (word1 & " + str(field_mask) + ")) & " + str(field_mask)]
+    return binary_prologue(name, fallback, in_place) + field_cases(cls, field_lines, fallback)
+
+#source of the * kernel, following the overflow mode of the layout
+def product_source(cls, name, fallback, in_place = False):
+    def field_lines(field_mask, shift, mask, extrema, length, is_a):
+        #the A field is the top of the word, so shifting it down needs no mask
+        bits0 = shifted("word0", shift) + ("" if is_a else " & " + str(mask))
+        bits1 = shifted("word1", shift) + ("" if is_a else " & " + str(mask))
+        placed = lambda bits: "(" + bits + ") << " + str(shift) if shift else "(" + bits + ")"
+        if cls.overflow == "wrap":
+            return ["result.word = " + placed("((" + bits0 + ") * (" + bits1 + ")) & " + str(mask))]
+        if is_a:
+            lines = ["value = (" + signed(bits0, length) + ") * (" + signed(bits1, length) + ")"]
+        else:
+            lines = ["value = (" + bits0 + ") * (" + bits1 + ")"]
+        lines.append("if not " + str(extrema[0]) + " <= value <= " + str(extrema[1]) + ":")
+        if cls.overflow == "saturate":
+            lines.append("    value = " + str(extrema[0]) + " if value < " + str(extrema[0]) + " else " + str(extrema[1]))
+        else:
+            lines.append("    raise OverflowException()")
+        lines.append("result.word = " + placed("value & " + str(mask)))
+        return lines
+    return binary_prologue(name, fallback, in_place) + field_cases(cls, field_lines, fallback)
+
+#source of ==, and for pure integer layouts of the orderings and hash()
+def comparison_source(cls):
+    value0 = integer_expression(cls, "self.word")
+    value1 = integer_expression(cls, "other.word")
+    if value0 is None:
+        return ["def equals(self, other):",
+                "    if type(other) is cls and self.word == other.word:",
+                "        return True",
+                "    return ABCMethods.equals(self, other)"]
+    lines = ["def equals(self, other):",
+             "    if type(other) is cls:",
+             "        return self.word == other.word",
+             "    return ABCMethods.equals(self, other)",
+             "",
+             "def value_hash(self):",
+             "    return hash((" + value0 + ", 1, 1))"]
+    for name, op in (("less", "<"), ("less_equal", "<="), ("greater", ">"), ("greater_equal", ">=")):
+        lines += ["",
+                  "def " + name + "(self, other):",
+                  "    if type(other) is cls:",
+                  "        return (" + value0 + ") " + op + " (" + value1 + ")",
+                  "    return ABCMethods.compare(self, other) " + op + " 0"]
+    return lines
+
+#source of the a, b and c property getters
+def field_source(cls):
+    a_val, b_val, c_val = field_expressions(cls, "self.word")
+    return ["def a_value(self):",
+            "    return " + a_val,
+            "",
+            "def b_value(self):",
+            "    return " + b_val,
+            "",
+            "def c_value(self):",
+            "    return " + c_val]
+
+"""
+Returns the kernels of cls as a dict from the name of the ABCMethods function each one
+replaces to the generated function, together with the source they were compiled from.
+namespace gives the generated code the names it refers to besides cls and new, which
+are ABCMethods and OverflowException.
+"""
+def build(cls, namespace):
+    sections = [field_source(cls), comparison_source(cls)]
+    if cls.a_len or cls.b_len:
+        sections += [sum_source(cls, "addition", "+", "ABCMethods.addition"),
+                     sum_source(cls, "subtraction", "-", "ABCMethods.subtraction"),
+                     product_source(cls, "multiplication", "ABCMethods.multiplication"),
+                     sum_source(cls, "in_place_addition", "+", "ABCMethods.in_place_addition", True),
+                     sum_source(cls, "in_place_subtraction", "-", "ABCMethods.in_place_subtraction", True),
+                     product_source(cls, "in_place_multiplication", "ABCMethods.in_place_multiplication", True)]
+    source = "\n\n".join("\n".join(section) for section in sections) + "\n"
+    scope = dict(namespace, cls = cls, new = object.__new__)
+    exec(compile_source(source), scope)
+    names = [line[4:line.index("(")] for line in source.split("\n") if line.startswith("def ")]
+    return {name: scope[name] for name in names}, source
@@ -0,0 +1,237 @@
+"""
+Lazy evaluation of floating-offset expressions. lazy(x) wraps a value of an ABC type in
+an Expression, and the arithmetic operators on Expressions build an expression graph
+instead of computing anything. A run of + and - (or of *) is recorded as one chain
+node holding its first operand and the list of later steps, and a chain extended from
+the middle shares the steps it has in common with the original, so building a chain of
+n operations takes O(n) time whichever way it branches.
+
+The graph is evaluated by evaluate() (or str(), float() and int()). Subexpressions are
+evaluated once per distinct structure: an operand that is itself an expression is looked
+up by the operations and values it is made of, so a product written out twice in a
+formula is computed once. Chains whose operands all share the fields the operation
+leaves alone are fused: the edited field is accumulated as a plain int and the result is
+packed once, so no intermediate instance is made. Everything else is evaluated one
+operation at a time with the operators of the values. Either way the result is exactly
+the one eager evaluation gives, wraparound included, and types with the saturate or
+raise overflow mode, where every intermediate step matters, are never fused.
+evaluate(normalized = True) normalizes the final result only.
+
+The left operand of an expression must be lazy: x + lazy(y) raises
+TypeMismatchException like any other operation between an ABC value and a non-ABC one,
+but lazy(x) + y works.
+"""
+
+import operator
+
+from floating_offset import ABCMethods
+
+#the operators an Expression can record
+OPERATORS = {"+": operator.add, "-": operator.sub, "*": operator.mul,
+             "//": operator.floordiv, "%": operator.mod, "/": operator.truediv}
+
+#operators that extend a chain, by the kind of chain they belong to
+CHAINS = {"+": "sum", "-": "sum", "*": "product"}
+
+"""
+A node of an expression graph. A leaf (kind None) holds a value of an ABC type in
+operands. A chain (kind "sum" or "product") holds its first operand and a list of
+(operator, operand) steps, of which the first length belong to it. Any other operation
+(kind "//", "%" or "/") holds its two operands. Operands are values or Expressions, and
+Expressions are never changed once built.
+"""
+class Expression:
+
+    __slots__ = ("kind", "operands", "steps", "length")
+
+    def __init__(self, kind, operands, steps = None, length = 0):
+        self.kind = kind
+        self.operands = operands
+        self.steps = steps
+        self.length = length
+
+    #the chain of kind continuing this expression with operation and other
+    def extend(self, operation, other):
+        if type(other) is Expression and other.kind is None:
+            other = other.operands
+        kind = CHAINS.get(operation)
+        if kind is None:
+            return Expression(operation, (self.operand(), other))
+        if self.kind != kind:
+            return Expression(kind, self.operand(), [(operation, other)], 1)
+        steps = self.steps
+        if len(steps) != self.length:
+            #another chain has already been extended from this one, so branch off a copy
+            steps = steps[:self.length]
+        steps.append((operation, other))
+        return Expression(kind, self.operands, steps, self.length + 1)
+
+    #this expression as an operand: a leaf stands for its value
+    def operand(self):
+        return self.operands if self.kind is None else self
+
+    def __add__(self, other):
+        return self.extend("+", other)
+
+    def __sub__(self, other):
+        return self.extend("-", other)
+
+    def __mul__(self, other):
+        return self.extend("*", other)
+
+    def __floordiv__(self, other):
+        return self.extend("//", other)
+
+    def __mod__(self, other):
+        return self.extend("%", other)
+
+    def __truediv__(self, other):
+        return self.extend("/", other)
+
+    #the value of the expression, normalized at the end if normalized is true
+    def evaluate(self, normalized = False):
+        result = evaluate(self)
+        return result.normalize() if normalized else result
+
+    def __str__(self):
+        return str(self.evaluate())
+
+    def __float__(self):
+        return float(self.evaluate())
+
+    def __int__(self):
+        return int(self.evaluate())
+
+    def __repr__(self):
+        if self.kind is None:
+            return "lazy(" + str(self.operands) + ")"
+        if self.kind not in ("sum", "product"):
+            return "(" + show(self.operands[0]) + " " + self.kind + " " + show(self.operands[1]) + ")"
+        return "(" + show(self.operands) + "".join(" " + operation + " " + show(term)
+                                                   for operation, term in self.steps[:self.length]) + ")"
+
+#the expression holding value, which may also be an expression already
+def lazy(value):
+    if isinstance(value, Expression):
+        return value
+    return Expression(None, value)
+
+#an operand as it appears in the repr of an expression
+def show(operand):
+    return repr(operand) if isinstance(operand, Expression) else str(operand)
+
+#the operands expression is made of: the value of a leaf, the two operands of an operation,
+#or the first operand and the terms of a chain
+def children(expression):
+    if expression.kind is None:
+        return [expression.operands]
+    if expression.kind not in ("sum", "product"):
+        return list(expression.operands)
+    return [expression.operands] + [term for _, term in expression.steps[:expression.length]]
+
+#the distinct expressions expression is made of, itself included, each after the ones it
+#is made of, found with an explicit stack and a set of the id()s already seen
+def walk(expression):
+    order = []
+    seen = set()
+    stack = [(expression, False)]
+    while stack:
+        node, done = stack.pop()
+        if done:
+            order.append(node)
+        elif id(node) not in seen:
+            seen.add(id(node))
+            stack.append((node, True))
+            stack.extend((child, False) for child in children(node) if isinstance(child, Expression))
+    return order
+
+#the int standing for the structure of expression, equal for expressions of the same
+#operations on the same types and words
+#keys holds the ints of the expressions it is made of by id(), and structures the int of
+#every structure seen so far, described by the kind and the ints or (type, word) of the operands
+def structure(expression, keys, structures):
+    parts = [keys[id(operand)] if isinstance(operand, Expression) else (type(operand), operand.word)
+             for operand in children(expression)]
+    if expression.kind in ("sum", "product"):
+        parts[1:] = [(operation, part) for (operation, _), part in zip(expression.steps, parts[1:])]
+    return structures.setdefault((expression.kind, *parts), len(structures))
+
+#the value of expression from the values of its operands, given by value_of
+def evaluate_node(expression, value_of):
+    if expression.kind is None:
+        #a leaf gives a copy of its value, so the result never aliases an operand
+        return ABCMethods.from_word(type(expression.operands), expression.operands.word)
+    if expression.kind not in ("sum", "product"):
+        left, right = expression.operands
+        return OPERATORS[expression.kind](value_of(left), value_of(right))
+    steps = expression.steps[:expression.length]
+    if any(type(term) is Expression for _, term in steps):
+        steps = [(operation, value_of(term)) for operation, term in steps]
+    return fuse(expression.kind, value_of(expression.operands), steps)
+
+"""
+Returns the value of expression. The expressions it is made of are evaluated in the order
+walk() gives, each once per structure, with the values kept by the int of their structure.
+expression itself is not an operand of anything, so its structure is never needed.
+"""
+def evaluate(expression):
+    keys, structures, values = {}, {}, {}
+    value_of = lambda operand: values[keys[id(operand)]] if isinstance(operand, Expression) else operand
+    for node in walk(expression)[:-1]:
+        key = keys[id(node)] = structure(node, keys, structures)
+        if key not in values:
+            values[key] = evaluate_node(node, value_of)
+    return evaluate_node(expression, value_of)
+
+#applies the chain of (operator, value) steps of kind to value, left to right, with the
+#result eager evaluation gives
+#when every value has one type that wraps on overflow and all of them share the fields
+#the chain leaves alone, the edited field is accumulated as an int and packed once
+def fuse(kind, value, steps):
+    cls = type(value)
+    if cls.overflow != ABCMethods.WRAP or any(type(term) is not cls for _, term in steps):
+        return apply(value, steps)
+    word = value.word
+    differences = 0
+    for _, term in steps:
+        differences |= term.word ^ word
+
+    #every step edits A: the result keeps the B and C fields of the first value
+    #wrapping is arithmetic modulo a power of two, so a sum is only masked at the end
+    untouched = cls.bc_field_mask
+    if cls.a_len != 0 and not differences & untouched:
+        mask, shift = cls.a_mask, cls.a_shift
+        if kind == "sum":
+            field = (word >> shift) + sum(term.word >> shift if operation == "+" else -(term.word >> shift)
+                                          for operation, term in steps)
+        else:
+            field = word >> shift
+            for _, term in steps:
+                field = field*(term.word >> shift) & mask
+        return ABCMethods.from_word(cls, (field & mask) << shift | (word & untouched))
+
+    #every step edits B, unless a partial result happens to have the B field of the next
+    #value, where eager evaluation would edit A instead and the rest is applied one by one
+    untouched = cls.ac_field_mask
+    if cls.b_len != 0 and not differences & untouched:
+        mask, shift = cls.b_mask, cls.b_shift
+        field = (word >> shift) & mask
+        for index, (operation, term) in enumerate(steps):
+            next_field = (term.word >> shift) & mask
+            if cls.a_len != 0 and field == next_field:
+                return apply(ABCMethods.from_word(cls, field << shift | (word & untouched)), steps[index:])
+            if operation == "+":
+                field = (field + next_field) & mask
+            elif operation == "-":
+                field = (field - next_field) & mask
+            else:
+                field = field*next_field & mask
+        return ABCMethods.from_word(cls, field << shift | (word & untouched))
+
+    return apply(value, steps)
+
+#applies the chain of (operator, value) steps to value one operation at a time
+def apply(value, steps):
+    for operation, term in steps:
+        value = OPERATORS[operation](value, term)
+    return value
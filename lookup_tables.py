@@ -0,0 +1,263 @@
+"""
+Lookup tables for narrow floating-offset layouts. A layout of at most TABLE_BITS bits
+has at most 65536 words, so instead of decoding a word and working on its fields every
+time, a type can read the answer off a table indexed by the word:
+
+    floats       float() and str() of every word
+    ranks        the position of every word's value in the sorted values of the layout,
+                 so ==, <, <=, > and >= compare two ints
+    normals      the word of the normal form of every word, for normalize() and the
+                 normal_word cache
+    operations   for layouts of at most OPERATION_BITS bits, the result word of +, -, *,
+                 //, % and / (and of +=, -= and *=) for every pair of words
+
+Tables are opt-in: install(cls), or ABC(..., tables = True), puts methods that look the
+answer up over the methods of the type. Nothing is computed until a method is first
+called. The floats and ranks are then built whole, and the normals and operation
+results are filled in one entry at a time, the first time each is asked for, since an
+entry can cost a factorization. A pair whose operation raises is remembered as such and
+handed to the method below the tables every time, so it raises exactly as it would
+without tables, as do operands of another type and words whose value is undefined.
+
+The table methods go on the type as layers owned by OWNER (see EqualityMeta), and what
+they fall back to is whatever method their layer covers at the time, so profiling or a
+backend can come and go over or under the tables.
+
+All tables together take at most MEMORY_LIMIT bytes, counting the scratch space the
+ranks are sorted in while they are built. A table that would go over the limit is not
+built, and the layers of the methods that need it are taken off again.
+"""
+
+import array
+import math
+
+import normalize
+import quantize
+from floating_offset import ABCMethods
+
+#layouts of at most this many bits can have tables
+TABLE_BITS = 16
+#layouts of at most this many bits also get tables of operation results
+OPERATION_BITS = 8
+#bytes all tables together may take
+MEMORY_LIMIT = 1 << 24
+#entries of the normals and operation tables not filled in yet, and operation results
+#that raise
+UNKNOWN = -1
+RAISES = -2
+
+#the operations with a result table, with the in-place methods that share it
+OPERATIONS = {"__add__": "__iadd__", "__sub__": "__isub__", "__mul__": "__imul__",
+              "__floordiv__": None, "__mod__": None, "__truediv__": None}
+
+#bytes taken by the tables built so far
+used = 0
+#types with tables installed
+installed = set()
+#the owner of the layers the tables put over the methods of types
+OWNER = "lookup_tables"
+
+#a new array of typecode holding size copies of value, or None when it, and scratch bytes
+#more used while it is built, would take the tables past MEMORY_LIMIT
+def allocate(typecode, size, value, scratch = 0):
+    global used
+    table = array.array(typecode, [value])
+    if used + table.itemsize*size + scratch > MEMORY_LIMIT:
+        return None
+    used += table.itemsize*size
+    return table*size
+
+#the float of every word of cls, with nan for words whose value is undefined
+def build_floats(cls):
+    floats = allocate("d", cls.vector_mask + 1, math.nan)
+    if floats is not None:
+        for word in range(cls.vector_mask + 1):
+            try:
+                floats[word] = ABCMethods.to_float(ABCMethods.from_word(cls, word))
+            except ZeroDivisionError:
+                pass
+    return floats
+
+#the rank of the value of every word of cls, -1 for words whose value is undefined
+#the ranks are those of quantize.table, built straight from the words in NumPy columns:
+#the floats are sorted, every run of floats too close to tell apart is one rank, and
+#only the words of runs of more than one value are decoded and split by their normal
+#forms, so nothing is kept per word but the ranks
+#the columns take at most 64 bytes a word while the ranks are built
+def build_ranks(cls):
+    import numpy as np
+    size = cls.vector_mask + 1
+    ranks = allocate("i", size, UNKNOWN, scratch = 64*size)
+    if ranks is None:
+        return None
+    from floating_offset_array import FloatingOffsetArray
+    a_vals, b_vals, c_vals = FloatingOffsetArray(cls, np.arange(size, dtype = np.uint64)).values()
+    a_vals, b_vals, c_vals = a_vals.astype(np.float64), b_vals.astype(np.float64), c_vals.astype(np.float64)
+    #the floats of quantize.approximate, with nan for words whose value is undefined
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        floats = np.where(c_vals == 1, a_vals*b_vals, np.where(c_vals == -1, a_vals/b_vals, a_vals*b_vals**(1/c_vals)))
+    floats[(c_vals == 0) | ((b_vals == 0) & (c_vals < 0))] = np.nan
+    del a_vals, b_vals, c_vals
+    order = np.argsort(floats, kind = "stable")[:np.count_nonzero(floats == floats)]
+    floats = floats[order]
+    together = np.abs(np.diff(floats)) <= quantize.TOLERANCE*np.maximum(np.abs(floats[:-1]), np.abs(floats[1:]))
+    first = np.concatenate(([True], ~together))
+    starts = np.flatnonzero(first)
+    run_ranks = np.cumsum(first) - 1
+    lengths = np.diff(np.append(starts, len(order)))
+    #the ranks the values of runs of more than one value add, from the end of their run on
+    extra = np.zeros(len(order) + 1, dtype = np.int64)
+    within = np.zeros(len(order), dtype = np.int64)
+    for start, length in zip(starts[lengths > 1].tolist(), lengths[lengths > 1].tolist()):
+        forms = {}
+        for position in range(start, start + length):
+            triple = ABCMethods.values(ABCMethods.from_word(cls, int(order[position])))
+            forms.setdefault(normalize.normalize(*triple), []).append(position)
+        for index, form in enumerate(sorted(forms, key = quantize.by_value)):
+            within[forms[form]] = index
+        extra[start + length] += len(forms) - 1
+    table = np.full(size, UNKNOWN, dtype = np.intc)
+    table[order] = run_ranks + np.cumsum(extra)[:-1] + within
+    memoryview(ranks)[:] = table
+    return ranks
+
+#float() and str(), which fall back to the methods below them for undefined values
+def install_floats(cls):
+    floats = None
+    def lookup(self):
+        nonlocal floats
+        if floats is None:
+            floats = build_floats(cls)
+            if floats is None:
+                cls.remove_layer("__float__", OWNER)
+                cls.remove_layer("__str__", OWNER)
+                return None
+        return floats[self.word]
+    def to_float(self):
+        value = lookup(self)
+        return cls.layer_below("__float__", OWNER)(self) if value is None or value != value else value
+    def represent(self):
+        value = lookup(self)
+        return cls.layer_below("__str__", OWNER)(self) if value is None or value != value else str(value)
+    cls.add_layer("__float__", OWNER, to_float)
+    cls.add_layer("__str__", OWNER, represent)
+
+#==, <, <=, > and >= through the ranks, falling back to the methods below them for operands
+#of another type and for undefined values
+def install_ranks(cls):
+    ranks = None
+    def lookup(self, other):
+        nonlocal ranks
+        if ranks is None:
+            ranks = build_ranks(cls)
+            if ranks is None:
+                for attribute in ("__eq__", "__lt__", "__le__", "__gt__", "__ge__"):
+                    cls.remove_layer(attribute, OWNER)
+                return UNKNOWN, UNKNOWN
+        return ranks[self.word], ranks[other.word]
+    def equals(self, other):
+        if type(other) is not cls:
+            return cls.layer_below("__eq__", OWNER)(self, other)
+        if self.word == other.word:
+            return True
+        rank0, rank1 = lookup(self, other)
+        if rank0 == UNKNOWN or rank1 == UNKNOWN:
+            return cls.layer_below("__eq__", OWNER)(self, other)
+        return rank0 == rank1
+    cls.add_layer("__eq__", OWNER, equals)
+    for attribute, order in (("__lt__", lambda rank0, rank1: rank0 < rank1), ("__le__", lambda rank0, rank1: rank0 <= rank1),
+                             ("__gt__", lambda rank0, rank1: rank0 > rank1), ("__ge__", lambda rank0, rank1: rank0 >= rank1)):
+        cls.add_layer(attribute, OWNER, ordering(cls, attribute, order, lookup))
+
+#the comparison method attribute of cls, comparing by order through the ranks given by lookup
+def ordering(cls, attribute, order, lookup):
+    def compare(self, other):
+        if type(other) is not cls:
+            return cls.layer_below(attribute, OWNER)(self, other)
+        rank0, rank1 = lookup(self, other)
+        if rank0 == UNKNOWN or rank1 == UNKNOWN:
+            return cls.layer_below(attribute, OWNER)(self, other)
+        return order(rank0, rank1)
+    return compare
+
+#normal_word, and with it normalize(), filled in a word at a time
+def install_normals(cls):
+    normals = None
+    def normal_word(word):
+        nonlocal normals
+        if normals is None:
+            normals = allocate("i", cls.vector_mask + 1, UNKNOWN)
+            if normals is None:
+                cls.remove_layer("normal_word", OWNER)
+                return cls.normal_word(word)
+        normal = normals[word]
+        if normal == UNKNOWN:
+            normal = normals[word] = ABCMethods.normalized_word(cls, word)
+        return normal
+    cls.add_layer("normal_word", OWNER, staticmethod(normal_word))
+
+#the operation attribute and its in-place form, filled in a pair of words at a time
+#a pair found in the table is answered straight away, and anything else goes through fill
+def install_operation(cls, attribute, in_place_attribute):
+    bits = cls.vector_size
+    results = None
+    #the result word of self and other, computing and storing it if it is not known yet,
+    #or RAISES when it raises or the table cannot be built
+    def fill(self, other):
+        nonlocal results
+        if results is None:
+            results = allocate("h", 1 << 2*bits, UNKNOWN)
+            if results is None:
+                cls.remove_layer(attribute, OWNER)
+                if in_place_attribute:
+                    cls.remove_layer(in_place_attribute, OWNER)
+                return RAISES
+        index = self.word << bits | other.word
+        word = results[index]
+        if word == UNKNOWN:
+            try:
+                word = cls.layer_below(attribute, OWNER)(self, other).word
+            except Exception:
+                word = RAISES
+            results[index] = word
+        return word
+    def operation(self, other):
+        if type(other) is cls:
+            word = results[self.word << bits | other.word] if results is not None else UNKNOWN
+            if word == UNKNOWN:
+                word = fill(self, other)
+            if word != RAISES:
+                result = object.__new__(cls)
+                result.word = word
+                return result
+        return cls.layer_below(attribute, OWNER)(self, other)
+    def in_place_operation(self, other):
+        if type(other) is cls:
+            word = results[self.word << bits | other.word] if results is not None else UNKNOWN
+            if word == UNKNOWN:
+                word = fill(self, other)
+            if word != RAISES:
+                self.word = word
+                return self
+        return cls.layer_below(in_place_attribute, OWNER)(self, other)
+    cls.add_layer(attribute, OWNER, operation)
+    if in_place_attribute:
+        cls.add_layer(in_place_attribute, OWNER, in_place_operation)
+
+"""
+Puts methods reading tables over the methods of cls, which are built or filled in on first
+use. Raises ValueError for layouts wider than TABLE_BITS bits, and does nothing for a
+type that already has tables.
+"""
+def install(cls):
+    if cls.vector_size > TABLE_BITS:
+        raise ValueError("tables need a layout of at most " + str(TABLE_BITS) + " bits")
+    if cls in installed:
+        return
+    installed.add(cls)
+    install_floats(cls)
+    install_ranks(cls)
+    install_normals(cls)
+    if cls.vector_size <= OPERATION_BITS:
+        for attribute, in_place_attribute in OPERATIONS.items():
+            install_operation(cls, attribute, in_place_attribute)
@@ -1,76 +1,303 @@
+import functools
+import math
+
+#largest number of distinct (A, B, C) triples whose normal form is remembered
+NORMALIZE_CACHE_SIZE = 4096
+#trial division runs up to this bound before switching to Pollard's rho
+TRIAL_LIMIT = 1 << 10
+#Pollard's rho gives up on a cofactor after this many iterations and keeps it whole
+RHO_LIMIT = 1 << 16
+#a radicand with more bits than this is never built when moving a root out of the denominator,
+#and a product of radicals that would need one raises OverflowError
+MAX_RADICAND_BITS = 1 << 16
+#deterministic Miller-Rabin witnesses for every n below 3.3*10^24
+WITNESSES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
 def lcm(x, y):
-   if x > y:
-       z = x
-   else:
-       z = y
-   while(True):
-       if((z % x == 0) and (z % y == 0)):
-           lcm = z
-           break
-       z += 1
-   return lcm
+   return math.lcm(x, y)
+
+#largest integer r with r**n <= x, by Newton's method on ints
+def iroot(x, n):
+    if x < 2 or n == 1:
+        return x
+    if n >= x.bit_length():
+        return 1
+    r = 1 << -(-x.bit_length() // n)
+    while True:
+        y = ((n - 1)*r + x//r**(n - 1))//n
+        if y >= r:
+            return r
+        r = y
+
+def is_prime(x):
+    if x < 2:
+        return False
+    for p in WITNESSES:
+        if x % p == 0:
+            return x == p
+    d = x - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in WITNESSES:
+        y = pow(a, d, x)
+        if y == 1 or y == x - 1:
+            continue
+        for _ in range(s - 1):
+            y = y*y % x
+            if y == x - 1:
+                break
+        else:
+            return False
+    return True
+
+#a nontrivial factor of the odd composite x by Brent's variant of Pollard's rho, or None
+def rho(x):
+    for c in range(1, 4):
+        y, r, q, g = 2, 1, 1, 1
+        iterations = 0
+        while g == 1 and iterations < RHO_LIMIT:
+            z = y
+            for _ in range(r):
+                y = (y*y + c) % x
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(128, r - k)):
+                    y = (y*y + c) % x
+                    q = q*abs(z - y) % x
+                g = math.gcd(q, x)
+                k += 128
+            iterations += r
+            r *= 2
+        if g == x:
+            g = 1
+            while g == 1:
+                ys = (ys*ys + c) % x
+                g = math.gcd(abs(z - ys), x)
+        if 1 < g < x:
+            return g
+    return None
+
+#prime factorization of x as a dict of prime: exponent
+#a cofactor that resists both trial division and Pollard's rho is kept whole, as if prime
+def factor(x):
+    factors = {}
+    d = 2
+    while d < TRIAL_LIMIT and d*d <= x:
+        while x % d == 0:
+            factors[d] = factors.get(d, 0) + 1
+            x //= d
+        d += 1 if d == 2 else 2
+    pending = [(x, 1)] if x > 1 else []
+    while pending:
+        x, e = pending.pop()
+        if is_prime(x):
+            factors[x] = factors.get(x, 0) + e
+            continue
+        for n in range(x.bit_length(), 1, -1):
+            root = iroot(x, n)
+            if root**n == x:
+                pending.append((root, e*n))
+                break
+        else:
+            g = rho(x)
+            if g is None:
+                factors[x] = factors.get(x, 0) + e
+            else:
+                pending.append((g, e))
+                pending.append((x//g, e))
+    return factors
+
+def product(factors):
+    result = 1
+    for p, e in factors.items():
+        result *= p**e
+    return result
+
+#divides the root index n by the largest number that also divides every exponent
+def reduce_index(factors, n):
+    g = n
+    for e in factors.values():
+        g = math.gcd(g, e)
+    return {p: e//g for p, e in factors.items()}, n//g
+
+"""
+Returns the canonical (A, B, C) triple for the value A*B^(1/C). Perfect C-th powers
+are pulled out of B into A, the root index is made as small as possible, a root is
+moved out of the denominator whenever that leaves an integer A, and a B of 1 always
+comes with a C of 1. Two triples have the same value exactly when their normal forms
+are equal. Raises ZeroDivisionError for C == 0 and for a B of 0 under a negative C.
+"""
+@functools.lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize(A, B, C):
+    if C == 0:
+        raise ZeroDivisionError("C is 0")
+    if B < 0:
+        raise ValueError("B is negative")
+    if A == 0 or (B == 0 and C > 0):
+        return (0, 1, 1)
+    if B == 0:
+        raise ZeroDivisionError("B is 0 under a negative C")
+    return normal_form(A, factor(B), C)
+
+#normal form of A*B^(1/C) for a nonzero A and a B given by its prime factorization
+def normal_form(A, factors, C):
+    n = abs(C)
+    k_factors = {p: e//n for p, e in factors.items() if e >= n}
+    k = product(k_factors)
+    factors = {p: e % n for p, e in factors.items() if e % n}
+
+    #A*k*r^(1/n), where r has no perfect n-th power left in it
+    if C > 0:
+        A *= k
+        factors, n = reduce_index(factors, n)
+        if not factors:
+            return (A, 1, 1)
+        return (A, product(factors), n)
+
+    #A/(k*r^(1/n)): cancel what A and k share
+    divisor = math.gcd(A, k)
+    A //= divisor
+    k //= divisor
+
+    #A/r^(1/n) equals (A/u)*(u^n/r)^(1/n) for u the product of the primes of r,
+    #which has an integer coefficient when u divides A
+    radical = product({p: 1 for p in factors})
+    if k == 1 and A % radical == 0 and \
+       sum((n - e)*p.bit_length() for p, e in factors.items()) <= MAX_RADICAND_BITS:
+        factors, n = reduce_index({p: n - e for p, e in factors.items()}, n)
+        if not factors:
+            return (A//radical, 1, 1)
+        return (A//radical, product(factors), n)
+
+    #what is left of k goes back under the root
+    for p in k_factors:
+        while k % p == 0:
+            factors[p] = factors.get(p, 0) + n
+            k //= p
+    factors, n = reduce_index(factors, n)
+    return (A, product(factors), -n)
+
+#returns the normal form of A*B^(1/C)
 def norm(A,B,C):
-    if C==1:
-        A=A*B
-        B=1
-        print(str(A) + " * (" + str(B) + ")^1/" + str(C))
-        return;
-    coeff = 0
-    c_isneg=False
-    if C<0:
-        c_isneg=True
-        C=abs(C)
-
-    tempB=B
-    while(tempB%C ==0):
-        coeff+=1
-        tempB=tempB//C
-    coeff = (coeff//C) * C
-    if coeff ==0:
-        coeff =1
-    B=B//coeff
-    if B==1:
-        C=1
-    if c_isneg:
-        x=A
-        y=coeff
-        while y != 0:
-            #get gcd(A,coeff)
-            #gcd will be x
-            (x, y) = (y, x % y)
-        A=A//x
-        B=((coeff//x)**C)*B
-        #coeff = coeff//x
-
-        C=-C
-    else:
-        A=A*coeff
-    print(str(A) + " * (" + str(B) + ")^1/" + str(C))
+    return normalize(A, B, C)
 
 
+"""
+Returns the normal form of A1*B1^(1/C1) * A2*B2^(1/C2) for any signs of C1 and C2.
+Both radicals are rewritten as powers of 1/L, with L the lcm of the root indices, so
+the product is A1*A2 times primes raised to signed multiples of 1/L. When some of
+those exponents are negative the product is rationalized by moving whole powers of
+their primes into A, which leaves a single root in the denominator for normal_form
+to simplify. Raises OverflowError when the radicand of the product would have more than
+MAX_RADICAND_BITS bits, as the lcm of two large coprime root indices can make it.
+"""
 def multiply(A1,B1,C1,A2,B2,C2):
-    if C1==C2:
-        A=A1*A2
-        B=B1*B2
-        C=C1
-        norm(A,B,C)
-    if (C1<0 and C2<0) or (C1>0 and C2>0):
-        is_C_neg = False
-        if C1<0:
-            is_C_neg = True
-            C1=abs(C1)
-            C2=abs(C2)
-        l = lcm(C1,C2)
-        B1 = B1 ** (l//C1)
-        B2 = B2 ** (l//C2)
-        C=l
-        B=B1*B2
-        A=A1*A2
-        if is_C_neg:
-            C=-C
-        norm(A,B,C)
-    else:
-        print("cannot multiply cleanly (there are radicals in both numerator and denominator)")
-
-
-multiply(1,5,3,1,2,2)
+    if C1 == 0 or C2 == 0:
+        raise ZeroDivisionError("C is 0")
+    if (B1 == 0 and C1 < 0) or (B2 == 0 and C2 < 0):
+        raise ZeroDivisionError("B is 0 under a negative C")
+    A = A1*A2
+    if A == 0 or B1 == 0 or B2 == 0:
+        return (0, 1, 1)
+    l = lcm(abs(C1), abs(C2))
+    exponents = {}
+    for B, C in ((B1, C1), (B2, C2)):
+        for p, e in factor(B).items():
+            exponents[p] = exponents.get(p, 0) + e*(l//C)
+    if all(e >= 0 for e in exponents.values()):
+        factors = {p: e for p, e in exponents.items() if e}
+        check_radicand(factors, l)
+        return normal_form(A, factors, l)
+    for p, e in exponents.items():
+        if e > 0:
+            m = -(-e//l)
+            A *= p**m
+            exponents[p] = e - m*l
+    factors = {p: -e for p, e in exponents.items() if e}
+    check_radicand(factors, l)
+    return normal_form(A, factors, -l)
+
+#raises OverflowError when the radicand normal_form builds from factors under the root
+#index n, once perfect powers are pulled out and the index is reduced, has more than
+#MAX_RADICAND_BITS bits
+def check_radicand(factors, n):
+    factors, n = reduce_index({p: e % n for p, e in factors.items() if e % n}, n)
+    if sum(e*p.bit_length() for p, e in factors.items()) > MAX_RADICAND_BITS:
+        raise OverflowError("the radicand of the product has more than " + str(MAX_RADICAND_BITS) + " bits")
+
+#the sign of A*B^(1/C) as -1, 0 or 1, raising like normalize for values that are undefined
+def sign(A, B, C):
+    if C == 0:
+        raise ZeroDivisionError("C is 0")
+    if B < 0:
+        raise ValueError("B is negative")
+    if B == 0 and C < 0:
+        raise ZeroDivisionError("B is 0 under a negative C")
+    if A == 0 or B == 0:
+        return 0
+    return 1 if A > 0 else -1
+
+#the natural log of the magnitude of a nonzero A*B^(1/C)
+def log_magnitude(A, B, C):
+    return math.log(abs(A)) + math.log(B)/C
+
+#whether two logs are too close for their floating-point error to tell them apart
+def too_close(log1, log2):
+    return abs(log1 - log2) <= 1e-12*(1 + abs(log1) + abs(log2))
+
+"""
+Returns whether A1*B1^(1/C1) equals A2*B2^(1/C2). Values of different signs or clearly
+different magnitudes are told apart without factoring anything, which keeps equality
+of wide radicals cheap, and only values too close to call compare their normal forms.
+"""
+def equal(A1,B1,C1,A2,B2,C2):
+    s = sign(A1, B1, C1)
+    if s != sign(A2, B2, C2):
+        return False
+    if s == 0:
+        return True
+    if not too_close(log_magnitude(A1, B1, C1), log_magnitude(A2, B2, C2)):
+        return False
+    return normalize(A1, B1, C1) == normalize(A2, B2, C2)
+
+"""
+Returns -1, 0 or 1 as A1*B1^(1/C1) is less than, equal to or greater than A2*B2^(1/C2),
+without rounding. Differing signs decide at once, and otherwise the magnitudes are
+compared by their logs. Only when the logs are too close to call are both values
+normalized, so equal values are found directly, and then raised to the lcm L of the
+root indices, which turns the radicals into integers. Two rationals (C of 1 or -1) are
+compared by cross-multiplying instead.
+"""
+def compare(A1,B1,C1,A2,B2,C2):
+    s = sign(A1, B1, C1)
+    other_sign = sign(A2, B2, C2)
+    if s != other_sign:
+        return -1 if s < other_sign else 1
+    if s == 0:
+        return 0
+    log1 = log_magnitude(A1, B1, C1)
+    log2 = log_magnitude(A2, B2, C2)
+    if not too_close(log1, log2):
+        return s if log1 > log2 else -s
+    if abs(C1) == 1 and abs(C2) == 1:
+        #two rationals compare by cross-multiplying, with nothing to factor
+        left = A1*(B1 if C1 == 1 else 1)*(B2 if C2 == -1 else 1)
+        right = A2*(B2 if C2 == 1 else 1)*(B1 if C1 == -1 else 1)
+        return (left > right) - (left < right)
+    A1, B1, C1 = normalize(A1, B1, C1)
+    A2, B2, C2 = normalize(A2, B2, C2)
+    if (A1, B1, C1) == (A2, B2, C2):
+        return 0
+    l = lcm(abs(C1), abs(C2))
+    left = abs(A1)**l
+    right = abs(A2)**l
+    for B, C, numerator in ((B1, C1, True), (B2, C2, False)):
+        power = B**(l//abs(C))
+        if (C > 0) == numerator:
+            left *= power
+        else:
+            right *= power
+    return s if left > right else -s
@@ -0,0 +1,158 @@
+"""
+A file format for storing many floating-offset numbers of one ABC type, laid out so it
+can be memory-mapped and scanned without turning every element into a Python object.
+
+The file starts with a single ASCII header line:
+
+    FLOATOFF <version> <offsets_string> <overflow>
+
+padded with spaces so that the line, newline included, is a multiple of HEADER_ALIGNMENT
+bytes long. After it come the records, one per value, each the byte_size big-endian
+bytes that to_bytes() gives for that value. The number of records is the size of the
+file after the header divided by byte_size.
+
+open_file() maps the file read-only. Indexing or iterating the result builds instances
+one at a time, words() exposes the records as a NumPy view of the mapped bytes, and
+array() and chunks() load ranges of records into FloatingOffsetArrays for vectorized
+scans in bounded memory. NumPy is only imported by those methods.
+"""
+
+import mmap
+
+from floating_offset import ABC, ABCMethods, NotImplementedException, TypeMismatchException
+
+FILE_MAGIC = b"FLOATOFF"
+FORMAT_VERSION = 1
+#the header is padded to this many bytes so the records stay aligned for NumPy
+HEADER_ALIGNMENT = 64
+#the header line must end within this many bytes
+MAX_HEADER_SIZE = 4096
+
+#the header bytes for a file of values of abc_type
+def header(abc_type):
+    line = FILE_MAGIC + (" " + str(FORMAT_VERSION) + " " + abc_type.offsets_string + " " + abc_type.overflow).encode("ascii")
+    return line + b" "*(-(len(line) + 1) % HEADER_ALIGNMENT) + b"\n"
+
+#parses the header at the start of data, returning the type it names and the header size
+#a layout that has not been created yet is created under its offsets_string
+def read_header(data):
+    end = data.find(b"\n", 0, MAX_HEADER_SIZE)
+    if end < 0:
+        raise ValueError("not a floating-offset file")
+    words = bytes(data[:end]).decode("ascii").split()
+    if len(words) != 4 or words[0].encode("ascii") != FILE_MAGIC:
+        raise ValueError("not a floating-offset file")
+    if words[1] != str(FORMAT_VERSION):
+        raise ValueError("unsupported format version " + words[1])
+    offset0, offset1, vector_size = (int(offset) for offset in words[2].split(":"))
+    return ABC(words[2], offset0, offset1, vector_size, words[3]), end + 1
+
+#writes the instances of abc_type in values to path, chunk_size records at a time
+def write(path, abc_type, values, chunk_size = 1 << 16):
+    with open(path, "wb") as file:
+        file.write(header(abc_type))
+        chunk = []
+        for value in values:
+            if type(value) != abc_type:
+                raise TypeMismatchException()
+            chunk.append(value.word.to_bytes(abc_type.byte_size, "big"))
+            if len(chunk) == chunk_size:
+                file.write(b"".join(chunk))
+                chunk = []
+        file.write(b"".join(chunk))
+
+#opens a file written by write() or FloatingOffsetArray.to_file() for reading
+def open_file(path):
+    return OffsetFile(path)
+
+"""
+A read-only, memory-mapped file of floating-offset numbers. The abc_type attribute is
+the type named by the header. Records are only decoded when they are asked for, so
+opening a file costs the same whatever its size. Close it, or use it in a with block,
+once the views returned by words() are no longer in use.
+"""
+class OffsetFile:
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+            self.abc_type, self.header_size = read_header(self.map)
+        except ValueError:
+            self.close()
+            raise
+        self.byte_size = self.abc_type.byte_size
+        body_size = len(self.map) - self.header_size
+        if body_size % self.byte_size != 0:
+            self.close()
+            raise ValueError("file ends in the middle of a record")
+        self.count = body_size//self.byte_size
+
+    def close(self):
+        if getattr(self, "map", None) is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    #the packed word of the record at index
+    def word(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("record index out of range")
+        start = self.header_size + index*self.byte_size
+        return int.from_bytes(self.map[start:start + self.byte_size], "big")
+
+    #single indices give an instance of abc_type, slices give a list of instances
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        return ABCMethods.from_word(self.abc_type, self.word(index))
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield ABCMethods.from_word(self.abc_type, self.word(index))
+
+    #the records from start to stop as a read-only NumPy view of the mapped bytes, with a
+    #big-endian unsigned dtype of byte_size bytes, or of single bytes per record column
+    #when byte_size is not a NumPy integer size
+    def words(self, start = 0, stop = None):
+        import numpy as np
+        start, stop, _ = slice(start, stop).indices(self.count)
+        stop = max(start, stop)
+        if self.byte_size in (1, 2, 4, 8):
+            dtype = np.dtype(">u" + str(self.byte_size))
+            return np.frombuffer(self.map, dtype = dtype, count = stop - start,
+                                 offset = self.header_size + start*self.byte_size)
+        raw = np.frombuffer(self.map, dtype = np.uint8, count = (stop - start)*self.byte_size,
+                            offset = self.header_size + start*self.byte_size)
+        return raw.reshape(-1, self.byte_size)
+
+    #the records from start to stop loaded into a FloatingOffsetArray
+    #raises NotImplementedException for records wider than the 8 bytes of its uint64 column
+    def array(self, start = 0, stop = None):
+        if self.byte_size > 8:
+            raise NotImplementedException("FloatingOffsetArray holds records of at most 8 bytes (64 bits), not " +
+                                          str(self.byte_size) + " bytes (" + self.abc_type.offsets_string + ")")
+        import numpy as np
+        from floating_offset_array import FloatingOffsetArray
+        words = self.words(start, stop)
+        if words.ndim == 2:
+            padded = np.zeros((len(words), 8), dtype = np.uint8)
+            padded[:, 8 - self.byte_size:] = words
+            words = padded.view(">u8").ravel()
+        return FloatingOffsetArray(self.abc_type, words.astype(np.uint64))
+
+    #yields FloatingOffsetArrays of at most size records covering the whole file
+    def chunks(self, size = 1 << 20):
+        for start in range(0, self.count, size):
+            yield self.array(start, start + size)
@@ -0,0 +1,127 @@
+"""
+Batch evaluation of floating-offset operations across processes. The packed words of
+the operands are copied once into multiprocessing.shared_memory blocks, and every worker
+of a concurrent.futures.ProcessPoolExecutor reads its slice of the batch straight from
+those blocks and writes its results into a shared output block. Only the function, the type's
+layout and the bounds of each slice are pickled, never the values themselves.
+
+For layouts of at most 64 bits each word is stored as a native uint64, so whole columns
+go in and out of the blocks as NumPy buffers, with no Python work per element beyond
+the function itself. Wider layouts store each word as the byte_size big-endian bytes
+that to_bytes() gives.
+
+The function is applied to instances exactly like the single-value methods, so
+parallel_map(ABCMethods.multiplication, ...) has the semantics of *, overflow modes and
+all, and parallel_map(ABCMethods.canonicalize, ...) normalizes a whole batch. It must be
+picklable, which module-level functions and the functions of ABCMethods are and
+lambdas are not. Small batches are not worth starting processes for and run in the
+calling process.
+"""
+
+import concurrent.futures
+import os
+from multiprocessing import shared_memory
+
+from floating_offset import ABC, ABCMethods, TypeMismatchException
+
+#batches with fewer elements than this run in the calling process
+SERIAL_THRESHOLD = 1 << 12
+#slices handed to each worker, so a slow slice does not hold up the whole batch
+SLICES_PER_WORKER = 4
+
+#the arguments to ABC that rebuild abc_type in a worker, where interning finds the same layout
+def layout(abc_type):
+    return (abc_type.offsets_string, abc_type.offset0, abc_type.offset1, abc_type.vector_size, abc_type.overflow)
+
+#applies function to the elements start to stop of the operand columns and returns the result words
+def apply(function, abc_type, columns, start, stop):
+    results = []
+    for index in range(start, stop):
+        operands = [ABCMethods.from_word(abc_type, column[index]) for column in columns]
+        results.append(function(*operands).word)
+    return results
+
+#bytes per word in the shared blocks
+def record_size(abc_type):
+    return 8 if abc_type.vector_size <= 64 else abc_type.byte_size
+
+#writes words into buffer from record start on
+def store(buffer, abc_type, start, words):
+    if abc_type.vector_size <= 64:
+        import numpy as np
+        np.ndarray(len(words), dtype = np.uint64, buffer = buffer, offset = start*8)[:] = np.asarray(words, dtype = np.uint64)
+        return
+    byte_size = abc_type.byte_size
+    buffer[start*byte_size:(start + len(words))*byte_size] = b"".join(int(word).to_bytes(byte_size, "big") for word in words)
+
+#the words in records start to stop of buffer, as a list of ints
+def load(buffer, abc_type, start, stop):
+    if abc_type.vector_size <= 64:
+        import numpy as np
+        return np.ndarray(stop - start, dtype = np.uint64, buffer = buffer, offset = start*8).tolist()
+    byte_size = abc_type.byte_size
+    data = bytes(buffer[start*byte_size:stop*byte_size])
+    return [int.from_bytes(data[i:i + byte_size], "big") for i in range(0, len(data), byte_size)]
+
+#worker side of parallel_map: reads the slice start to stop of every input block, applies
+#function and writes the result words to the same slice of the output block
+def run_slice(function, abc_args, input_names, output_name, start, stop):
+    abc_type = ABC(*abc_args)
+    blocks = [shared_memory.SharedMemory(name = name) for name in input_names]
+    output = shared_memory.SharedMemory(name = output_name)
+    try:
+        columns = [load(block.buf, abc_type, start, stop) for block in blocks]
+        store(output.buf, abc_type, start, apply(function, abc_type, columns, 0, stop - start))
+    finally:
+        for block in blocks + [output]:
+            block.close()
+
+#a shared memory block holding the words of a column
+def share(words, abc_type):
+    block = shared_memory.SharedMemory(create = True, size = max(1, len(words)*record_size(abc_type)))
+    store(block.buf, abc_type, 0, words)
+    return block
+
+"""
+Returns the list of words of function applied elementwise to the values of abc_type
+packed in the given word columns, which may be lists, array.arrays, NumPy arrays or any
+other sequences of ints of equal length. A unary function takes one column and a binary
+function two. The work is split into slices run by executor, or by a pool of worker
+processes created for the call when no executor is given. An exception raised for any
+element, such as OverflowException under the raise overflow mode, is raised here.
+"""
+def parallel_map(function, abc_type, *columns, workers = None, executor = None):
+    count = len(columns[0])
+    if any(len(column) != count for column in columns):
+        raise ValueError("columns have different lengths")
+    if count < SERIAL_THRESHOLD:
+        return apply(function, abc_type, [[int(word) for word in column] for column in columns], 0, count)
+    workers = workers or os.cpu_count() or 1
+    blocks = [share(column, abc_type) for column in columns]
+    output = shared_memory.SharedMemory(create = True, size = count*record_size(abc_type))
+    own_executor = executor is None
+    if own_executor:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers = workers)
+    try:
+        step = -(-count//(workers*SLICES_PER_WORKER))
+        futures = [executor.submit(run_slice, function, layout(abc_type), [block.name for block in blocks],
+                                   output.name, start, min(start + step, count))
+                   for start in range(0, count, step)]
+        for future in futures:
+            future.result()
+        return load(output.buf, abc_type, 0, count)
+    finally:
+        if own_executor:
+            executor.shutdown()
+        for block in blocks + [output]:
+            block.close()
+            block.unlink()
+
+#parallel_map over instances of one type, returning instances
+def parallel_map_values(function, *columns, workers = None, executor = None):
+    abc_type = type(columns[0][0])
+    if any(type(value) != abc_type for column in columns for value in column):
+        raise TypeMismatchException()
+    words = parallel_map(function, abc_type, *[[value.word for value in column] for column in columns],
+                         workers = workers, executor = executor)
+    return [ABCMethods.from_word(abc_type, word) for word in words]
@@ -0,0 +1,197 @@
+"""
+Opt-in profiling of floating-offset types. While profiling is enabled, the operator
+methods of every ABC type are covered by layers of wrappers that count calls, time them, record
+which case the arithmetic took and count overflows and exceptions. Disabling takes the
+layers off again, so when profiling is off the types run exactly the code they
+would run without this module, with no check of any kind on the hot path.
+
+    with profiling.profile() as stats:
+        ...
+    profiling.print_stats(stats)
+
+stats() returns what has been recorded so far, as a dict from type to a dict from
+operation name to its counters:
+
+    calls      number of calls
+    seconds    total time spent in the calls
+    branches   for + - * += -= *= // % /, how many calls took each case: "A field"
+               (B and C agree), "B field" (A and C agree), "mixed" (neither, so the
+               operands were normalized or multiplied exactly), "rational" (/ of two
+               values with C of 1 or -1) or "other type" (an operand of another type, to
+               be converted), and "not implemented" when the call raised
+               NotImplementedException
+    overflows  field-wise results that did not fit their field and were wrapped,
+               saturated or raised according to the type's overflow mode
+    errors     exceptions raised, by exception class name
+"""
+
+import contextlib
+import time
+
+from floating_offset import EqualityMeta, NotImplementedException
+
+#the methods wrapped on each type, by attribute, with the operation name they are recorded under
+OPERATIONS = {"__init__": "construct", "__str__": "represent", "normalize": "normalize",
+              "__or__": "bitwise_or", "__and__": "bitwise_and", "__xor__": "bitwise_xor", "__invert__": "bitwise_not",
+              "__eq__": "equals", "__lt__": "less", "__le__": "less_equal", "__gt__": "greater", "__ge__": "greater_equal",
+              "__hash__": "hash",
+              "__add__": "addition", "__sub__": "subtraction", "__mul__": "multiplication",
+              "__iadd__": "in_place_addition", "__isub__": "in_place_subtraction", "__imul__": "in_place_multiplication",
+              "__floordiv__": "floor_division", "__mod__": "modulo", "__truediv__": "true_division",
+              "__float__": "float", "__int__": "int"}
+
+#the field-wise operations, with the exact operation on field values used to detect overflow
+FIELD_OPERATIONS = {"addition": lambda x, y: x + y, "subtraction": lambda x, y: x - y,
+                    "multiplication": lambda x, y: x*y, "in_place_addition": lambda x, y: x + y,
+                    "in_place_subtraction": lambda x, y: x - y, "in_place_multiplication": lambda x, y: x*y,
+                    "floor_division": lambda x, y: x//y if y else 0, "modulo": None, "true_division": None}
+
+#recorded counters, keyed by type and then by operation name
+recorded = {}
+#the owner of the layers profiling adds over the methods of types
+OWNER = "profiling"
+
+#the types profiling has put wrappers over
+instrumented = set()
+
+#the counters of operation on cls, created empty on first use
+def counters(cls, operation):
+    operations = recorded.setdefault(cls, {})
+    if operation not in operations:
+        operations[operation] = {"calls": 0, "seconds": 0.0, "branches": {}, "overflows": 0, "errors": {}}
+    return operations[operation]
+
+#the case the field-wise operations take for self and other, and whether the exact result
+#of the field operation exact leaves the field
+def branch(self, other, exact, operation):
+    if type(other) is not type(self):
+        return "other type", False
+    if operation == "true_division" and self.c in (1, -1) and other.c in (1, -1):
+        return "rational", False
+    difference = self.word ^ other.word
+    if not difference & self.bc_field_mask and self.a_len != 0:
+        extrema, values = self.a_extrema, (self.a, other.a)
+        case = "A field"
+    elif not difference & self.ac_field_mask and self.b_len != 0:
+        extrema, values = self.b_extrema, (self.b, other.b)
+        case = "B field"
+    else:
+        return "mixed", False
+    if exact is None:
+        return case, False
+    return case, not extrema[0] <= exact(*values) <= extrema[1]
+
+#the wrapper recording the calls of attribute of cls, recorded under operation, which calls
+#whatever method its layer covers at the time
+def wrap(cls, attribute, operation):
+    exact = FIELD_OPERATIONS.get(operation, False)
+    def recorder(self, *args, **kwargs):
+        method = cls.layer_below(attribute, OWNER)
+        record = counters(type(self), operation)
+        record["calls"] += 1
+        case = None
+        if exact is not False:
+            case, overflow = branch(self, args[0], exact, operation)
+            record["overflows"] += overflow
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        except Exception as exception:
+            name = type(exception).__name__
+            record["errors"][name] = record["errors"].get(name, 0) + 1
+            if isinstance(exception, NotImplementedException):
+                case = "not implemented"
+            raise
+        finally:
+            record["seconds"] += time.perf_counter() - start
+            if case is not None:
+                record["branches"][case] = record["branches"].get(case, 0) + 1
+    return recorder
+
+#puts recording wrappers over the methods of cls
+def instrument(cls):
+    if cls not in instrumented:
+        instrumented.add(cls)
+        for attribute, operation in OPERATIONS.items():
+            cls.add_layer(attribute, OWNER, wrap(cls, attribute, operation))
+
+#starts recording on every existing type and every type created from now on
+def enable():
+    for cls in list(EqualityMeta.interned.values()):
+        instrument(cls)
+    if instrument not in EqualityMeta.creation_hooks:
+        EqualityMeta.creation_hooks.append(instrument)
+
+#stops recording and takes the wrappers off again, keeping what was recorded
+def disable():
+    if instrument in EqualityMeta.creation_hooks:
+        EqualityMeta.creation_hooks.remove(instrument)
+    for cls in instrumented:
+        for attribute in OPERATIONS:
+            cls.remove_layer(attribute, OWNER)
+    instrumented.clear()
+
+#whether recording is on
+def enabled():
+    return instrument in EqualityMeta.creation_hooks
+
+#what has been recorded, as a dict from type to operation name to counters
+def stats():
+    return {cls: {operation: dict(record, branches = dict(record["branches"]), errors = dict(record["errors"]))
+                  for operation, record in operations.items()}
+            for cls, operations in recorded.items()}
+
+#forgets everything recorded so far
+def reset():
+    recorded.clear()
+
+#adds the counters of recorded_stats, in the form stats() gives, to the recorded counters
+def merge(recorded_stats):
+    for cls, operations in recorded_stats.items():
+        for operation, record in operations.items():
+            total = counters(cls, operation)
+            for name in ("calls", "seconds", "overflows"):
+                total[name] += record[name]
+            for name in ("branches", "errors"):
+                for key, count in record[name].items():
+                    total[name][key] = total[name].get(key, 0) + count
+
+"""
+Records the operations run inside a with block and gives the stats of the block alone as
+the value of the with statement, filled in when the block ends. Counters recorded before
+the block are kept and the block's are added to them, and profiling is left on after the
+block if it was on before, so profile() can be used inside an enabled session or inside
+another profile().
+"""
+@contextlib.contextmanager
+def profile():
+    was_enabled = enabled()
+    before = stats()
+    reset()
+    result = {}
+    enable()
+    try:
+        yield result
+    finally:
+        if not was_enabled:
+            disable()
+        result.update(stats())
+        reset()
+        merge(before)
+        merge(result)
+
+#prints one line per type and operation with its counters
+def print_stats(recorded_stats = None):
+    recorded_stats = stats() if recorded_stats is None else recorded_stats
+    for cls, operations in recorded_stats.items():
+        print(cls.__name__ + " (" + cls.offsets_string + ", " + cls.overflow + ")")
+        for operation, record in sorted(operations.items()):
+            line = "  " + operation.ljust(24) + str(record["calls"]).rjust(10) + " calls " + \
+                   format(record["seconds"]*1e6, ".0f").rjust(10) + " us"
+            if record["branches"]:
+                line += "  " + ", ".join(case + ": " + str(count) for case, count in sorted(record["branches"].items()))
+            if record["overflows"]:
+                line += "  overflows: " + str(record["overflows"])
+            if record["errors"]:
+                line += "  " + ", ".join(name + ": " + str(count) for name, count in sorted(record["errors"].items()))
+            print(line)
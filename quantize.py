@@ -0,0 +1,384 @@
+"""
+Quantization of floats, ints, Fractions and Decimals to the nearest value a
+floating-offset layout can hold. There are three modes: "nearest", "floor" (the
+largest value that is at most x) and "ceil" (the smallest value that is at least x).
+A tie under "nearest" goes to the value with the smaller magnitude. x is compared
+exactly with the values of the layout, irrational ones included. The one exception is
+a "nearest" choice between two neighbours of which one is irrational, whose distances
+to x are compared to PRECISION_DIGITS significant digits.
+
+A layout of at most TABLE_BITS bits has its values tabulated the first time it is
+quantized to. Every word is decoded, equal values are merged into one entry, and that
+entry keeps the word of the value's normal form when the layout has it. The entries
+are sorted by value, so a quantization is a bisect of the table, and the bulk
+quantize() does all its lookups with one NumPy searchsorted. Only values within float
+rounding error of a table entry, or of the midpoint between two entries, are checked
+exactly.
+
+A wider layout has too many values to tabulate, so x is searched within the value
+families of the layout, each bounded by a_extrema, b_extrema and c_extrema:
+
+    integers   A, with B of 1, and B or -B, with C of 1
+    fractions  A/B, with C of -1, through the continued fraction of x
+    roots      B^(1/C) and -B^(1/C), for C up to MAX_ROOT_INDEX in size
+
+Values that need A, B and C together, such as 3*5^(1/2), are only found through the
+table of a narrow layout.
+
+Values outside the range of the layout, infinities included, go to the extreme value
+under "nearest". Under "floor" and "ceil" they raise OverflowException when no value
+lies on the requested side. NaN raises ValueError.
+
+Every type has this as TypeX.from_float(x, mode), and FloatingOffsetArray.from_floats
+quantizes a whole column.
+"""
+
+import bisect
+import fractions
+import functools
+import math
+
+import normalize
+from floating_offset import ABCMethods, OverflowException
+
+MODES = ("nearest", "floor", "ceil")
+#layouts of at most this many bits are quantized through a table of all their values
+TABLE_BITS = 16
+#largest root index tried when searching a layout too wide to tabulate
+MAX_ROOT_INDEX = 8
+#relative distance within which two floats may stand for values in either order
+TOLERANCE = 1e-12
+#significant digits to which two irrational neighbours are compared when x is about
+#midway between them
+PRECISION_DIGITS = 40
+
+#orders (A, B, C) triples by their exact values
+by_value = functools.cmp_to_key(lambda triple0, triple1: normalize.compare(*triple0, *triple1))
+
+#whether two floats are too close for their rounding error to tell their values apart
+def close(float0, float1):
+    return abs(float0 - float1) <= TOLERANCE*max(abs(float0), abs(float1))
+
+#the float value of a triple that is defined
+def approximate(a_val, b_val, c_val):
+    if c_val == 1:
+        return float(a_val*b_val)
+    if c_val == -1:
+        return a_val/b_val
+    return a_val*b_val**(1/c_val)
+
+#the value of a triple as a Fraction, or None when it is irrational
+def rational(triple):
+    a_val, b_val, c_val = triple if abs(triple[2]) == 1 else normalize.normalize(*triple)
+    if c_val == 1:
+        return fractions.Fraction(a_val*b_val)
+    if c_val == -1:
+        return fractions.Fraction(a_val, b_val)
+    return None
+
+#the value of a triple times 10^digits, rounded down, computed with integer roots
+def scaled(triple, digits):
+    a_val, b_val, c_val = normalize.normalize(*triple)
+    n = abs(c_val)
+    power = abs(a_val)**n*10**(digits*n) if digits >= 0 else abs(a_val)**n
+    divisor = 1 if digits >= 0 else 10**(-digits*n)
+    root = normalize.iroot(power*b_val//divisor if c_val > 0 else power//(b_val*divisor), n)
+    return root if a_val >= 0 else -root - 1
+
+"""
+Returns the table of abc_type as three lists sorted by value: the float of each distinct
+value, the word standing for it and its (A, B, C) triple, and a fourth list giving the
+position in the other three of the value of every word, or -1 for words whose value is
+undefined. Runs of entries whose floats are too close to tell apart are sorted exactly
+and merged by their normal forms.
+"""
+@functools.lru_cache(maxsize = None)
+def table(abc_type):
+    entries = []
+    for word in range(abc_type.vector_mask + 1):
+        triple = ABCMethods.values(ABCMethods.from_word(abc_type, word))
+        if triple[2] == 0 or (triple[1] == 0 and triple[2] < 0):
+            continue
+        entries.append((approximate(*triple), word, triple))
+    entries.sort()
+    floats, words, triples = [], [], []
+    ranks = [-1]*(abc_type.vector_mask + 1)
+    start = 0
+    while start < len(entries):
+        stop = start + 1
+        while stop < len(entries) and close(entries[stop - 1][0], entries[stop][0]):
+            stop += 1
+        if stop - start == 1:
+            groups = [(entries[start][2], [entries[start]])]
+        else:
+            forms = {}
+            for entry in entries[start:stop]:
+                forms.setdefault(normalize.normalize(*entry[2]), []).append(entry)
+            groups = sorted(forms.items(), key = lambda group: by_value(group[0]))
+        for form, members in groups:
+            word = next((entry[1] for entry in members if entry[2] == form), members[0][1])
+            #floats inside a run are kept in exact order, so the list stays sorted
+            floats.append(max(members[0][0], floats[-1]) if floats else members[0][0])
+            words.append(word)
+            triples.append(form)
+            for entry in members:
+                ranks[entry[1]] = len(words) - 1
+        start = stop
+    return floats, words, triples, ranks
+
+#the table of abc_type as NumPy columns of floats and words
+@functools.lru_cache(maxsize = None)
+def table_arrays(abc_type):
+    import numpy as np
+    floats, words, _, _ = table(abc_type)
+    return np.array(floats, dtype = np.float64), np.array(words, dtype = np.uint64)
+
+#the index of the largest table entry that is at most x, -1 if there is none
+#x is given as its float and as an exact triple
+def locate(abc_type, x_float, x_triple):
+    floats, _, triples, _ = table(abc_type)
+    index = bisect.bisect_right(floats, x_float) - 1
+    while index >= 0 and close(floats[index], x_float) and normalize.compare(*triples[index], *x_triple) > 0:
+        index -= 1
+    while index + 1 < len(floats) and close(floats[index + 1], x_float) and \
+          normalize.compare(*triples[index + 1], *x_triple) <= 0:
+        index += 1
+    return index
+
+#the exact triple of the largest value of the bounded families of abc_type that is at
+#most x and of the smallest that is at least x, each None when there is none
+#x is a Fraction
+def search(abc_type, x):
+    lowers, uppers = [], []
+    for family in (integers, ratios, roots):
+        for triple, candidates in zip(family(abc_type, x), (lowers, uppers)):
+            if triple is not None:
+                candidates.append(triple)
+    return max(lowers, key = by_value, default = None), min(uppers, key = by_value, default = None)
+
+#whether a field with the given extrema can hold value
+def holds(extrema, value):
+    return extrema[0] <= value <= extrema[1]
+
+#the integers of abc_type around x: A itself, and B or -B under a C of 1
+def integers(abc_type, x):
+    c_unit = 1 if holds(abc_type.c_extrema, 1) else -1
+    intervals = [(abc_type.a_extrema, lambda n: (n, 1, c_unit))]
+    if abc_type.b_len != 0 and holds(abc_type.c_extrema, 1):
+        b_min, b_max = abc_type.b_extrema
+        if holds(abc_type.a_extrema, 1):
+            intervals.append(((b_min, b_max), lambda n: (1, n, 1)))
+        if holds(abc_type.a_extrema, -1):
+            intervals.append(((-b_max, -b_min), lambda n: (-1, -n, 1)))
+    lower = upper = None
+    below, above = math.floor(x), math.ceil(x)
+    for (low, high), triple in intervals:
+        if below >= low and (lower is None or min(below, high) > lower[0]):
+            lower = (min(below, high), triple)
+        if above <= high and (upper is None or max(above, low) < upper[0]):
+            upper = (max(above, low), triple)
+    return (lower[1](lower[0]) if lower else None), (upper[1](upper[0]) if upper else None)
+
+"""
+Returns the largest fraction that is at most p/q and the smallest that is at least p/q,
+for p and q positive, among the fractions with a numerator of at most N and a
+denominator from 1 to D, each as a (numerator, denominator) pair. The upper one is None
+when there is none. The interval between two neighbours of the Stern-Brocot tree
+narrows around p/q, taking as many steps toward it as the continued fraction of p/q
+allows at once, until the next mediant leaves the bounds.
+"""
+def bounds(p, q, N, D):
+    lo_n, lo_d, hi_n, hi_d = 0, 1, 1, 0
+    while True:
+        m_n, m_d = lo_n + hi_n, lo_d + hi_d
+        if m_n > N or m_d > D:
+            return (lo_n, lo_d), ((hi_n, hi_d) if hi_d else None)
+        if m_n*q == p*m_d:
+            return (m_n, m_d), (m_n, m_d)
+        if m_n*q < p*m_d:
+            k = (p*lo_d - lo_n*q - 1)//(hi_n*q - p*hi_d)
+            k = min(k, (N - lo_n)//hi_n, (D - lo_d)//hi_d if hi_d else k)
+            lo_n, lo_d = lo_n + k*hi_n, lo_d + k*hi_d
+        else:
+            k = (hi_n*q - p*hi_d - 1)//(p*lo_d - lo_n*q)
+            k = min(k, (N - hi_n)//lo_n if lo_n else k, (D - hi_d)//lo_d)
+            hi_n, hi_d = hi_n + k*lo_n, hi_d + k*lo_d
+
+#the fractions A/B of abc_type around x, under a C of -1
+def ratios(abc_type, x):
+    if abc_type.b_len == 0 or not holds(abc_type.c_extrema, -1) or abc_type.a_len < 2:
+        return None, None
+    if x == 0:
+        return (0, 1, -1), (0, 1, -1)
+    a_min, a_max = abc_type.a_extrema
+    if x > 0:
+        lower, upper = bounds(x.numerator, x.denominator, a_max, abc_type.b_extrema[1])
+        return (lower[0], lower[1], -1), (upper and (upper[0], upper[1], -1))
+    lower, upper = bounds(-x.numerator, x.denominator, -a_min, abc_type.b_extrema[1])
+    return (upper and (-upper[0], upper[1], -1)), (-lower[0], lower[1], -1)
+
+#the B giving the largest B^(1/C) that is at most p/q and the B giving the smallest that
+#is at least p/q, for p of 0 or more, q positive and B from b_min to b_max, each None
+#when there is none
+def radicands(p, q, c_val, b_min, b_max):
+    if c_val > 0:
+        numerator, denominator = p**c_val, q**c_val
+        lower, upper = min(numerator//denominator, b_max), max(-(-numerator//denominator), b_min)
+        return (lower if lower >= b_min else None), (upper if upper <= b_max else None)
+    #B^(1/C) falls as B grows, and a B of 0 is undefined
+    b_min = max(b_min, 1)
+    if p == 0:
+        return None, b_max
+    numerator, denominator = q**-c_val, p**-c_val
+    lower, upper = max(-(-numerator//denominator), b_min), min(numerator//denominator, b_max)
+    return (lower if lower <= b_max else None), (upper if upper >= b_min else None)
+
+#the roots B^(1/C) of abc_type around x, for C other than 0 and 1 up to MAX_ROOT_INDEX in
+#size, taken as -B^(1/C) for a negative x
+#roots of the other sign than x are never nearer to it than the 0 of the integers
+def roots(abc_type, x):
+    unit = 1 if x > 0 or (x == 0 and holds(abc_type.a_extrema, 1)) else -1
+    if abc_type.b_len == 0 or not holds(abc_type.a_extrema, unit):
+        return None, None
+    b_min, b_max = abc_type.b_extrema
+    c_min, c_max = abc_type.c_extrema
+    lowers, uppers = [], []
+    for c_val in range(max(c_min, -MAX_ROOT_INDEX), min(c_max, MAX_ROOT_INDEX) + 1):
+        if c_val in (0, 1):
+            continue
+        below, above = radicands(abs(x.numerator), x.denominator, c_val, b_min, b_max)
+        if unit < 0:
+            below, above = above, below
+        if below is not None:
+            lowers.append((unit, below, c_val))
+        if above is not None:
+            uppers.append((unit, above, c_val))
+    return max(lowers, key = by_value, default = None), min(uppers, key = by_value, default = None)
+
+#whether the neighbour lower of x is at least as near to x as the neighbour upper, each
+#given as a triple with its float, or None when x lies beyond the values of the layout
+def nearer(x, x_float, lower, upper):
+    if lower is None or upper is None:
+        return upper is None
+    (lower_triple, lower_float), (upper_triple, upper_float) = lower, upper
+    below, above = x_float - lower_float, upper_float - x_float
+    if close(below, above):
+        low, high = rational(lower_triple), rational(upper_triple)
+        if low is not None and high is not None:
+            below, above = x - low, high - x
+        else:
+            #PRECISION_DIGITS significant digits of each value, each off by at most one unit
+            #of the last digit, so distances within four units are taken as a tie
+            digits = PRECISION_DIGITS - math.floor(math.log10(max(abs(lower_float), abs(upper_float))))
+            scaled_x = math.floor(x*10**digits)
+            below = scaled_x - scaled(lower_triple, digits)
+            above = scaled(upper_triple, digits) - scaled_x
+            if abs(below - above) <= 4:
+                below = above
+    if below != above:
+        return below < above
+    return abs(lower_float) <= abs(upper_float)
+
+"""
+Returns the word of abc_type for x under mode, which is "nearest", "floor" or "ceil".
+x may be an int, a float, a Fraction or a Decimal.
+"""
+def quantize_word(abc_type, x, mode = "nearest"):
+    if mode not in MODES:
+        raise ValueError("mode must be one of " + ", ".join(MODES))
+    if isinstance(x, float) and math.isnan(x):
+        raise ValueError("cannot quantize nan")
+    #a float strictly between two table entries and clear of their midpoint needs no
+    #exact comparison
+    if abc_type.vector_size <= TABLE_BITS and type(x) is float and math.isfinite(x):
+        floats, words, _, _ = table(abc_type)
+        index = bisect.bisect_right(floats, x) - 1
+        if 0 <= index < len(floats) - 1 and not close(floats[index], x) and not close(floats[index + 1], x):
+            below, above = x - floats[index], floats[index + 1] - x
+            if mode != "nearest":
+                return words[index if mode == "floor" else index + 1]
+            if not close(below, above):
+                return words[index if below < above else index + 1]
+    if isinstance(x, float) and math.isinf(x):
+        if mode != "nearest" and (mode == "ceil") == (x > 0):
+            raise OverflowException()
+        #every value of the layout is smaller in magnitude than 2^(a_len + b_len)
+        x = math.copysign(2**(abc_type.a_len + abc_type.b_len), x)
+    x = fractions.Fraction(x)
+    try:
+        x_float = float(x)
+    except OverflowError:
+        x_float = math.copysign(math.inf, x)
+    x_triple = (x.numerator, x.denominator, -1)
+
+    if abc_type.vector_size <= TABLE_BITS:
+        floats, words, triples, _ = table(abc_type)
+        lower = locate(abc_type, x_float, x_triple)
+        if lower >= 0 and normalize.compare(*triples[lower], *x_triple) == 0:
+            return words[lower]
+        upper = lower + 1
+        if mode == "nearest":
+            chosen = lower if nearer(x, x_float, (triples[lower], floats[lower]) if lower >= 0 else None,
+                                     (triples[upper], floats[upper]) if upper < len(floats) else None) else upper
+        else:
+            chosen = lower if mode == "floor" else upper
+        if not 0 <= chosen < len(floats):
+            raise OverflowException()
+        return words[chosen]
+
+    lower, upper = search(abc_type, x)
+    if mode == "nearest" and lower is not None and normalize.compare(*lower, *x_triple) == 0:
+        chosen = lower
+    elif mode == "nearest":
+        chosen = lower if nearer(x, x_float, lower and (lower, approximate(*lower)),
+                                 upper and (upper, approximate(*upper))) else upper
+    else:
+        chosen = lower if mode == "floor" else upper
+    if chosen is None:
+        raise OverflowException()
+    return ABCMethods.pack(abc_type, *chosen)
+
+"""
+Returns the words of abc_type for the floats in values, which may be any sequence of
+floats or a NumPy array, as a NumPy uint64 column for layouts of at most TABLE_BITS bits.
+Every lookup is done at once by searchsorted on the table, and only the elements whose
+answer float rounding could change are handed to quantize_word.
+"""
+def quantize_table(abc_type, values, mode = "nearest"):
+    import numpy as np
+    if mode not in MODES:
+        raise ValueError("mode must be one of " + ", ".join(MODES))
+    floats, words = table_arrays(abc_type)
+    x = np.asarray(values, dtype = np.float64)
+    if np.isnan(x).any():
+        raise ValueError("cannot quantize nan")
+    index = np.searchsorted(floats, x, side = "right") - 1
+    lower_float = floats[np.clip(index, 0, len(floats) - 1)]
+    upper_float = floats[np.clip(index + 1, 0, len(floats) - 1)]
+    with np.errstate(invalid = "ignore"):
+        near = lambda float0, float1: np.abs(float0 - float1) <= TOLERANCE*np.maximum(np.abs(float0), np.abs(float1))
+        suspect = near(lower_float, x) | near(upper_float, x)
+        if mode == "floor":
+            chosen = index
+        elif mode == "ceil":
+            chosen = np.where((index >= 0) & (lower_float == x), index, index + 1)
+        else:
+            below, above = x - lower_float, upper_float - x
+            smaller = np.where(below == above, np.abs(lower_float) <= np.abs(upper_float), below < above)
+            chosen = np.clip(np.where(smaller, index, index + 1), 0, len(floats) - 1)
+            chosen = np.where(index < 0, 0, chosen)
+            suspect |= near(below, above)
+    missing = ((chosen < 0) | (chosen >= len(floats))) & ~suspect
+    if missing.any():
+        raise OverflowException()
+    result = words[np.clip(chosen, 0, len(floats) - 1)]
+    for position in np.flatnonzero(suspect):
+        result[position] = quantize_word(abc_type, float(x[position]), mode)
+    return result
+
+#the words of abc_type for every number in values, as a list
+#layouts of at most TABLE_BITS bits go through quantize_table, which reads values as floats
+def quantize(abc_type, values, mode = "nearest"):
+    if abc_type.vector_size <= TABLE_BITS:
+        return quantize_table(abc_type, values, mode).tolist()
+    return [quantize_word(abc_type, x, mode) for x in values]
@@ -0,0 +1,221 @@
+"""
+Streaming sums, products and dot products of floating-offset numbers. fo_sum, fo_prod
+and fo_dot take any iterable, generators included, and read it once without building a
+list.
+
+Within a run of values that share the fields the operation leaves alone (B and C for
+the A field, A and C for the B field, by the same rules as + and *), the edited field is
+accumulated as an unbounded Python int, with no instance made and no type checked per
+value. The result is brought into the field once, when the run ends, according to the
+type's overflow mode. Under "wrap" this gives exactly the result of folding the values
+with + or *, since wrapping is arithmetic modulo a power of two. Under "saturate" and
+"raise" it is the exact run total that is clamped or raises, where the fold would
+wrap each sum silently and clamp or raise at each product. A value that does not fit
+the current run ends it and is combined with the total by the ordinary operator, so
+mixed forms are normalized or raise exactly as they would there.
+
+A run on the B field also ends where the partial result would have the B field of the
+next value, because + and * edit the A field for that pair.
+"""
+
+import itertools
+
+from floating_offset import ABCMethods
+
+"""
+The running total of a sum ("+") or product ("*"). total is the result so far as an
+instance, or None before the first value. While a run is open, field is "A" or "B", exact
+is the exact value of that field and rest is the word of the other fields, and total is
+the instance the run started from.
+"""
+class Accumulator:
+
+    #the total is a copy of start, so the result never aliases it, even when no value is added
+    def __init__(self, operation, start = None):
+        self.operation = operation
+        self.total = None if start is None else ABCMethods.from_word(type(start), start.word)
+        self.field = None
+        self.exact = 0
+        self.rest = 0
+
+    #the field bits the exact value would be closed with, without raising
+    def bits(self):
+        cls = type(self.total)
+        extrema, mask = (cls.a_extrema, cls.a_mask) if self.field == "A" else (cls.b_extrema, cls.b_mask)
+        if cls.overflow == ABCMethods.WRAP or extrema[0] <= self.exact <= extrema[1]:
+            return self.exact & mask
+        return (extrema[0] if self.exact < extrema[0] else extrema[1]) & mask
+
+    #folds factor into the exact value of the open run
+    #products that wrap are kept to the field's bits, and products that saturate or raise
+    #are clamped just past the field's extrema, which keeps them out of range whatever
+    #nonzero factor comes next
+    def combine(self, value):
+        if self.operation == "+":
+            self.exact += value
+            return
+        cls = type(self.total)
+        extrema, mask = (cls.a_extrema, cls.a_mask) if self.field == "A" else (cls.b_extrema, cls.b_mask)
+        if cls.overflow == ABCMethods.WRAP:
+            self.exact = self.exact*value & mask
+        else:
+            bound = max(-extrema[0], extrema[1]) + 1
+            self.exact = max(-bound, min(self.exact*value, bound))
+
+    #starts a run on field from the total and a first exact field value of value
+    def open(self, field, value):
+        cls = type(self.total)
+        self.field = field
+        if field == "A":
+            self.rest = self.total.word & cls.bc_field_mask
+            self.exact = ABCMethods.to_signed(self.total.word >> cls.a_shift, cls.a_len)
+        else:
+            self.rest = self.total.word & cls.ac_field_mask
+            self.exact = (self.total.word >> cls.b_shift) & cls.b_mask
+        self.combine(value)
+
+    #ends the open run, packing its exact value into the total, and returns the total
+    def close(self):
+        if self.field is not None:
+            cls = type(self.total)
+            if self.field == "A":
+                bits = ABCMethods.fit_field(self.exact, cls.a_extrema, cls.a_mask, cls.overflow) << cls.a_shift
+            else:
+                bits = ABCMethods.fit_field(self.exact, cls.b_extrema, cls.b_mask, cls.overflow) << cls.b_shift
+            self.field = None
+            self.total = ABCMethods.from_word(cls, bits | self.rest)
+        return self.total
+
+    #adds or multiplies value into the total
+    def add(self, value):
+        cls = type(self.total)
+        if type(value) is cls:
+            word = value.word
+            if self.field == "A" and word & cls.bc_field_mask == self.rest:
+                self.combine(ABCMethods.to_signed(word >> cls.a_shift, cls.a_len))
+                return
+            if self.field == "B" and word & cls.ac_field_mask == self.rest and \
+               not (cls.a_len != 0 and self.bits() == (word >> cls.b_shift) & cls.b_mask):
+                self.combine((word >> cls.b_shift) & cls.b_mask)
+                return
+        total = self.close()
+        if total is None:
+            self.total = ABCMethods.from_word(type(value), value.word)
+            return
+        if type(value) is cls:
+            difference = total.word ^ value.word
+            if not difference & cls.bc_field_mask and cls.a_len != 0:
+                self.open("A", ABCMethods.to_signed(value.word >> cls.a_shift, cls.a_len))
+                return
+            if not difference & cls.ac_field_mask and cls.b_len != 0:
+                self.open("B", (value.word >> cls.b_shift) & cls.b_mask)
+                return
+        self.total = total + value if self.operation == "+" else total*value
+
+    #adds the product of x and y into a sum, keeping a product of two values that differ
+    #only in A exact, like the sum it goes into
+    def add_product(self, x, y):
+        cls = type(x)
+        if type(y) is cls and cls.a_len != 0 and not (x.word ^ y.word) & cls.bc_field_mask:
+            rest = x.word & cls.bc_field_mask
+            term = ABCMethods.to_signed(x.word >> cls.a_shift, cls.a_len)*ABCMethods.to_signed(y.word >> cls.a_shift, cls.a_len)
+            if self.field == "A" and type(self.total) is cls and self.rest == rest:
+                self.exact += term
+                return
+            total = self.close()
+            if total is None or (type(total) is cls and total.word & cls.bc_field_mask == rest):
+                if total is None:
+                    self.total = ABCMethods.from_word(cls, rest)
+                self.open("A", term)
+                return
+        self.add(x*y)
+
+    #adds or multiplies in every value of values, reading them in a loop of its own while a
+    #run is open on the A field, or on the B field of a type that wraps
+    def extend(self, values):
+        values = iter(values)
+        for value in values:
+            self.add(value)
+            if self.field is None:
+                continue
+            cls, rest, exact = type(self.total), self.rest, self.exact
+            wraps = cls.overflow == ABCMethods.WRAP
+            if self.field == "A" and (self.operation == "+" or wraps):
+                untouched, shift, mask, sign = cls.bc_field_mask, cls.a_shift, cls.a_mask, 1 << (cls.a_len - 1)
+                for value in values:
+                    if type(value) is not cls or value.word & untouched != rest:
+                        self.exact = exact
+                        self.add(value)
+                        break
+                    if self.operation == "+":
+                        exact += (value.word >> shift ^ sign) - sign
+                    else:
+                        exact = exact*((value.word >> shift ^ sign) - sign) & mask
+                else:
+                    self.exact = exact
+            elif self.field == "B" and wraps:
+                untouched, shift, mask, collides = cls.ac_field_mask, cls.b_shift, cls.b_mask, cls.a_len != 0
+                exact &= mask
+                for value in values:
+                    field = (value.word >> shift) & mask if type(value) is cls else None
+                    if field is None or value.word & untouched != rest or (collides and exact == field):
+                        self.exact = exact
+                        self.add(value)
+                        break
+                    if self.operation == "+":
+                        exact = (exact + field) & mask
+                    else:
+                        exact = exact*field & mask
+                else:
+                    self.exact = exact
+
+    #adds the products of the paired values of xs and ys, reading them in a loop of its own
+    #while a run on the A field is open
+    def extend_products(self, xs, ys):
+        missing = object()
+        pairs = itertools.zip_longest(xs, ys, fillvalue = missing)
+        for x, y in pairs:
+            if x is missing or y is missing:
+                raise ValueError("xs and ys have different lengths")
+            self.add_product(x, y)
+            if self.field != "A":
+                continue
+            cls, rest = type(self.total), self.rest
+            untouched, shift, sign = cls.bc_field_mask, cls.a_shift, 1 << (cls.a_len - 1)
+            exact = self.exact
+            for x, y in pairs:
+                if type(x) is not cls or type(y) is not cls or x.word & untouched != rest or y.word & untouched != rest:
+                    self.exact = exact
+                    if x is missing or y is missing:
+                        raise ValueError("xs and ys have different lengths")
+                    self.add_product(x, y)
+                    break
+                exact += ((x.word >> shift ^ sign) - sign)*((y.word >> shift ^ sign) - sign)
+            else:
+                self.exact = exact
+
+    #the result, raising ValueError when no value was given and there is no start
+    def result(self):
+        total = self.close()
+        if total is None:
+            raise ValueError("reduction of an empty iterable with no start value")
+        return total
+
+#the sum of the values, added to start if it is given
+def fo_sum(values, start = None):
+    accumulator = Accumulator("+", start)
+    accumulator.extend(values)
+    return accumulator.result()
+
+#the product of the values, multiplied into start if it is given
+def fo_prod(values, start = None):
+    accumulator = Accumulator("*", start)
+    accumulator.extend(values)
+    return accumulator.result()
+
+#the sum of the products of the paired values of xs and ys, added to start if it is given
+#raises ValueError when xs and ys have different lengths
+def fo_dot(xs, ys, start = None):
+    accumulator = Accumulator("+", start)
+    accumulator.extend_products(xs, ys)
+    return accumulator.result()
@@ -1,72 +1,33 @@
-li1 = [False, False, False, False, False, False, True, False, True, False, True]
-li2 = [False, False, False, False, False, False, False, True, False, True, True]
-
-
-
-
-def shift_left(li):
-    li.append(False)
-    del li[0]
-
-def shift_right(li):
-    li=[False]+li
-    del li[len(li)-1]
-
-
-
-def russian_peasant_signed(li1,li2):
-    is_neg=False
-    if li1[0]=True:
-        is_neg=True
-        li1 = invert(li1)
-    if li2[0]=True:
-        is_neg=False
-        li2 = invert(li2)
-    else:
-        is_neg=True
-
-
-    while (li2>0):
-        if (li2[len(li2)-1] == True):
-            res=addition(res,li1)
-
-        li1 = shift_left(li1)
-        li2 = shift_right(li2)
-
-    if is_neg:
-        res = invert(res)
-    return res
-
-
-def russian_peasant_unsigned(li1,li2):
-    while (li2>0):
-        if (li2[len(li2)-1] == True):
-            res=addition(res,li1)
-
-        li1 = shift_left(li1)
-        li2 = shift_right(li2)
-    return res
-
-
-def divide_unsigned(divisor,dividend):
-    divisor_index=len(divisor)-1
-    dividend_shift=0
-    while (divisor[divisor_index]!=True):
-        divisor_index-=1
-        dividend_shift+=1
-    for i in (0,dividend_shift):
-        shift_left(dividend)
-
-    Q;
-    while 1:
-        t= difference(divisor,dividend)
-        if t>=0:
-            Q=Q+[True]
-            divisor=t
-        else:
-            break
-        shift_left(divisor)
-        shift_left(dividend)
-    for i in (0,dividend_shift):
-        shift_right(Q)
-    return Q
+from floating_offset import ABCMethods
+
+#the width shared by two bit lists, raising ValueError when they differ
+def width(li1,li2):
+    if len(li1)!=len(li2):
+        raise ValueError("bit lists of widths "+str(len(li1))+" and "+str(len(li2)))
+    return len(li1)
+
+
+#multiplies two's complement bit lists as fixed-width words
+#the product keeps the width of both lists, with overflow handled according to the given mode
+def russian_peasant_signed(li1,li2,overflow=ABCMethods.WRAP):
+    length=width(li1,li2)
+    res=ABCMethods.to_signed(ABCMethods.bits_to_int(li1),length)*ABCMethods.to_signed(ABCMethods.bits_to_int(li2),length)
+    res=ABCMethods.fit_field(res,ABCMethods.signed_extremes(length),2**length-1,overflow)
+    return ABCMethods.int_to_bits(res,length)
+
+
+#multiplies unsigned bit lists as fixed-width words
+#the product keeps the width of both lists, with overflow handled according to the given mode
+def russian_peasant_unsigned(li1,li2,overflow=ABCMethods.WRAP):
+    length=width(li1,li2)
+    res=ABCMethods.bits_to_int(li1)*ABCMethods.bits_to_int(li2)
+    res=ABCMethods.fit_field(res,ABCMethods.unsigned_extremes(length),2**length-1,overflow)
+    return ABCMethods.int_to_bits(res,length)
+
+
+#divides unsigned bit lists as fixed-width words, returning the quotient with the width of both lists
+#word-level long division (Python int //) replaces shifting and subtracting one bit at a time
+def divide_unsigned(li1,li2):
+    length=width(li1,li2)
+    Q=ABCMethods.bits_to_int(li1)//ABCMethods.bits_to_int(li2)
+    return ABCMethods.int_to_bits(Q,length)